@@ -0,0 +1,139 @@
+"""
+Description:
+Group identical command outputs across hosts (--group).
+
+Each host's outputs are normalized (trailing whitespace and blank lines
+dropped) and hashed as soon as the host completes, then its results are
+released. Every distinct output is kept once, with the hosts that returned
+it, so memory grows with the number of different outputs instead of the
+number of hosts. With "--group masked", volatile fields (the device's own
+hostname, uptimes, serial numbers, MAC addresses, free memory, timestamps
+and counters) are masked before hashing, so outputs that only differ by
+those land in one group.
+
+Groups are printed per command, largest first. Hosts that returned an
+output no other host did are marked as outliers.
+"""
+
+from hashlib import sha256
+from threading import Lock
+from scheduler import run_scheduled
+from stream_output import flatten
+import json
+import re
+
+# Pattern -> replacement for fields that differ between otherwise equal outputs.
+VOLATILE = [
+    (re.compile(r"(uptime is |uptime:\s*).*", re.IGNORECASE), r"\1<uptime>"),
+    # Only labelled serials, so e.g. IOS "2 Serial interfaces" is left alone.
+    (
+        re.compile(
+            r"(\b(?:(?:system )?serial(?: number| num)?|sn)\s*:\s*"
+            r"|\bprocessor board id\s+)\S+",
+            re.IGNORECASE,
+        ),
+        r"\1<serial>",
+    ),
+    (
+        re.compile(
+            r"(\b(?:system|hardware|base ethernet) mac address\s*:\s*)\S+",
+            re.IGNORECASE,
+        ),
+        r"\1<mac>",
+    ),
+    (re.compile(r"(\bfree memory\s*:\s*)\d+", re.IGNORECASE), r"\1<n>"),
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:\.\d+)?\b"), "<time>"),
+    (re.compile(r"\b\d+[ywdh]\d+[wdhm]\b"), "<duration>"),
+    (
+        re.compile(
+            r"\b\d+( packets| bytes| input errors| output errors| CRC| drops)",
+            re.IGNORECASE,
+        ),
+        r"<n>\1",
+    ),
+]
+
+# Host names listed per group before they're summarized.
+MAX_LISTED = 10
+
+
+def normalize(output, names=(), mask=False):
+    if not isinstance(output, str):
+        output = json.dumps(output, indent=2, sort_keys=True, default=str)
+    text = "\n".join(line.rstrip() for line in output.strip("\n").splitlines())
+    if mask:
+        # Longest first, so a FQDN is masked before its short name.
+        for name in sorted(filter(None, set(names)), key=len, reverse=True):
+            pattern = r"(?<![\w-])" + re.escape(name) + r"(?![\w-])"
+            text = re.sub(pattern, "<hostname>", text, flags=re.IGNORECASE)
+        for pattern, replacement in VOLATILE:
+            text = pattern.sub(replacement, text)
+    return text
+
+
+class OutputGroups:
+    def __init__(self, mask=False):
+        self.mask = mask
+        self.lock = Lock()
+        # command -> digest -> {"output", "hosts"}
+        self.groups = {}
+        self.failed = []
+
+    def add(self, host, names, results, failed):
+        with self.lock:
+            if failed:
+                self.failed.append(host)
+                return
+        for r in results:
+            # Skip the parent task's own result, the commands are subtasks.
+            if r.result is None:
+                continue
+            text = normalize(r.result, names, self.mask)
+            digest = sha256(text.encode()).hexdigest()
+            with self.lock:
+                group = self.groups.setdefault(r.name, {}).setdefault(
+                    digest, {"output": text, "hosts": []}
+                )
+                group["hosts"].append(host)
+
+    def print_groups(self):
+        for command, groups in self.groups.items():
+            total = sum(len(group["hosts"]) for group in groups.values())
+            print(
+                f"==== {command}: {len(groups)} distinct output(s) "
+                f"across {total} hosts " + "=" * 20
+            )
+            for group in sorted(groups.values(), key=lambda g: -len(g["hosts"])):
+                hosts = sorted(group["hosts"])
+                listed = ", ".join(hosts[:MAX_LISTED])
+                if len(hosts) > MAX_LISTED:
+                    listed += f" and {len(hosts) - MAX_LISTED} more"
+                outlier = " (outlier)" if len(hosts) == 1 and total > 1 else ""
+                print(f"---- {len(hosts)} host(s){outlier}: {listed}")
+                print(group["output"])
+        if self.failed:
+            print("Failed: " + ", ".join(sorted(self.failed)))
+
+
+def grouped(task, group_task, groups, **kwargs):
+    # Run group_task, add its outputs to the groups and release them from memory.
+    names = (task.host.name, task.host.hostname)
+    try:
+        group_task(task, **kwargs)
+    except Exception:
+        # Failed hosts keep their results so Nornir reports the exception.
+        groups.add(task.host.name, names, [], True)
+        raise
+    groups.add(task.host.name, names, list(flatten(task.results)), False)
+    del task.results[:]
+    return "Grouped."
+
+
+def run_grouped(hosts, task, mode, **kwargs):
+    # Drop-in for run_scheduled that groups outputs. Prints the groups at the end.
+    groups = OutputGroups(mask=mode == "masked")
+    result = run_scheduled(
+        hosts, grouped, name=task.__name__, group_task=task, groups=groups, **kwargs
+    )
+    groups.print_groups()
+    return result
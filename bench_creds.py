@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Benchmark the per-task cost of credentials as the inventory grows.
+
+For each inventory size, a sample of tasks is timed:
+    - before: every task calls the old get_creds, which loads .env and
+      walks every host in the inventory.
+    - after: get_creds runs once at startup (its cost is spread over the
+      hosts) and each task re-attaches its own host's secrets with
+      host_creds, as eos_conf does.
+The per-task cost before grows with the inventory, after it stays flat.
+
+Usage:
+    :param sizes: inventory sizes to time. Defaults to 100 1000 3000.
+    :param tasks: tasks timed per size. Defaults to 100.
+
+➜ python bench_creds.py
+hosts       before/task     after/task
+100            0.953ms        0.006ms
+1000           2.689ms        0.005ms
+3000           5.945ms        0.004ms
+"""
+
+from os import getenv
+from types import SimpleNamespace
+import argparse
+import time
+
+
+def old_get_creds(nr):
+    # get_creds as it was, called from every task.
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    password = getenv("PASSWORD")
+    snmp_key = getenv("SNMP_KEY")
+    tacacs_key = getenv("TACACS_KEY")
+    cg_password = getenv("CG_PASSWORD")
+    for host in nr.inventory.hosts.values():
+        if host.platform == "cloudgenix_ion":
+            host.password = cg_password
+        else:
+            host.password = password
+        host["tacacs_key"] = tacacs_key
+        host["snmp_key"] = snmp_key
+
+
+def inventory(size):
+    from nornir.core.inventory import Host
+
+    platforms = ["eos", "ios", "cloudgenix_ion"]
+    hosts = {
+        f"host{i}": Host(name=f"host{i}", platform=platforms[i % 3])
+        for i in range(size)
+    }
+    return SimpleNamespace(inventory=SimpleNamespace(hosts=hosts))
+
+
+def per_task(size, tasks):
+    import nornir_utilities
+
+    nr = inventory(size)
+    names = list(nr.inventory.hosts)[:tasks]
+
+    start = time.perf_counter()
+    for _ in names:
+        old_get_creds(nr)
+    before = (time.perf_counter() - start) / len(names)
+
+    nornir_utilities.creds.clear()
+    start = time.perf_counter()
+    nornir_utilities.get_creds(nr)
+    startup = (time.perf_counter() - start) / size
+    start = time.perf_counter()
+    for name in names:
+        nornir_utilities.host_creds(nr.inventory.hosts[name])
+    after = startup + (time.perf_counter() - start) / len(names)
+    return before, after
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark credential loading.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 3000])
+    parser.add_argument("--tasks", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'hosts':8} {'before/task':>14} {'after/task':>14}")
+    for size in args.sizes:
+        before, after = per_task(size, min(args.tasks, size))
+        print(f"{size:<8} {before * 1000:12.3f}ms {after * 1000:12.3f}ms")
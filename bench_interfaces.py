@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Micro-benchmark interface name normalization over a large corpus of names.
+
+The corpus is read from a file (one interface name per line, e.g. collected
+from "show ip interface brief") or generated from the port layouts seen
+across the fleet: IOS access and distribution switches, EOS leaves and
+routers, in long and short forms. Each name is turned into the DNS label
+used by dns_crawl:
+    - before: the old if/elif chain of dns_crawl.iface_rename.
+    - after, cold: interfaces.dns_label with an empty cache.
+    - after, warm: interfaces.dns_label once every name has been seen.
+Names the old chain returned None for are counted.
+
+Usage:
+    :param corpus: file of interface names. Defaults to a generated corpus.
+    :param switches: switches in the generated corpus. Defaults to 2000.
+
+➜ python bench_interfaces.py
+corpus: 86500 names, 171 distinct
+before          86500 names    0.09s  20500 returned None
+after, cold     86500 names    0.03s
+after, warm     86500 names    0.02s
+"""
+
+import argparse
+import time
+
+
+def old_iface_rename(iface):
+    # dns_crawl.iface_rename as it was.
+    if iface.startswith("Vlan"):
+        return iface.replace("Vlan", "-vlan")
+    elif iface.startswith("TenGigabitEthernet"):
+        return iface.replace("TenGigabitEthernet", "-te").replace("/", "-")
+    elif iface.startswith("GigabitEthernet"):
+        return iface.replace("GigabitEthernet", "-ge").replace("/", "-")
+    elif iface.startswith("Ethernet"):
+        return iface.replace("Ethernet", "-eth").replace("/", "-")
+    elif iface.startswith("Port-channel"):
+        return iface.replace("Port-channel", "-po").replace("/", "-")
+    elif iface.startswith("Port-Channel"):
+        return iface.replace("Port-Channel", "-po").replace("/", "-")
+    elif iface.startswith("FastEthernet"):
+        return iface.replace("FastEthernet", "-fe")
+    elif iface.startswith("Management"):
+        return iface.replace("Management", "-mgmt")
+    elif iface.startswith("Loopback"):
+        return iface.replace("Loopback", "-lo")
+    elif iface.startswith("Tunnel"):
+        return iface.replace("Tunnel", "-tu")
+
+
+def generated_corpus(switches):
+    names = []
+    for i in range(switches):
+        kind = i % 4
+        if kind == 0:
+            # IOS access switch.
+            names += [f"GigabitEthernet1/0/{p}" for p in range(1, 49)]
+            names += [f"TenGigabitEthernet1/1/{p}" for p in range(1, 5)]
+            names += ["Vlan1", "Vlan91", "Port-channel1", "Loopback0"]
+        elif kind == 1:
+            # IOS-XE distribution switch, short forms from LLDP and CDP.
+            names += [f"Twe1/0/{p}" for p in range(1, 25)]
+            names += [f"HundredGigE1/0/{p}" for p in range(49, 53)]
+            names += [f"Te1/0/{p}" for p in range(1, 9)]
+            names += ["Vl91", "Vl93", "Po10", "Lo0", "Tunnel0"]
+        elif kind == 2:
+            # EOS leaf.
+            names += [f"Ethernet{p}" for p in range(1, 49)]
+            names += [f"Ethernet{p}/1" for p in range(49, 55)]
+            names += ["Port-Channel10", "Port-Channel2000", "Vlan4094"]
+            names += ["Management1", "Loopback0", "Loopback1"]
+        else:
+            # Router.
+            names += [f"GigabitEthernet0/0/{p}" for p in range(0, 4)]
+            names += [f"FastEthernet0/{p}" for p in range(0, 8)]
+            names += ["Loopback0", "Tunnel100", "Tunnel200", "Gi0/0/0.100"]
+    return names
+
+
+def timed(label, rename, names):
+    start = time.monotonic()
+    labels = [rename(name) for name in names]
+    elapsed = time.monotonic() - start
+    missing = labels.count(None)
+    note = f"  {missing} returned None" if missing else ""
+    print(f"{label:15} {len(names)} names {elapsed:7.2f}s{note}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark interface names.")
+    parser.add_argument("--corpus", help="File of interface names, one per line.")
+    parser.add_argument("--switches", type=int, default=2000)
+    args = parser.parse_args()
+
+    from interfaces import dns_label, split
+
+    if args.corpus:
+        with open(args.corpus) as f:
+            names = [line.strip() for line in f if line.strip()]
+    else:
+        names = generated_corpus(args.switches)
+    print(f"corpus: {len(names)} names, {len(set(names))} distinct")
+
+    timed("before", old_iface_rename, names)
+    for cached in (split, dns_label):
+        cached.cache_clear()
+    timed("after, cold", lambda name: "-" + dns_label(name), names)
+    timed("after, warm", lambda name: "-" + dns_label(name), names)
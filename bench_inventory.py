@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Benchmark inventory startup as the inventory grows: SimpleInventory against
+the compiled snapshot in inventory_snapshot.py.
+
+For each size, synthetic hosts.yaml, groups.yaml and defaults.yaml files are
+generated in a temporary directory and loaded:
+    - before: SimpleInventory, parsing the YAML on every run.
+    - after, cold: SnapshotInventory on the first run, parsing the YAML and
+      writing the snapshot and host index.
+    - after, warm: SnapshotInventory on the next run, loading the snapshot.
+Every load must return the same hosts and data.
+
+Usage:
+    :param sizes: inventory sizes to time. Defaults to 500 2000 5000.
+
+➜ python bench_inventory.py
+hosts       before   after, cold   after, warm
+500          0.76s         0.80s         0.06s
+2000         3.09s         3.02s         0.27s
+5000         7.76s         8.22s         0.55s
+"""
+
+from os.path import join
+from tempfile import TemporaryDirectory
+import argparse
+import time
+
+GROUPS = """---
+
+eos:
+  platform: "eos"
+  port: 443
+
+ios:
+  platform: "ios"
+  port: 22
+
+cisco_wlc:
+  platform: "cisco_wlc"
+  port: 22
+"""
+
+DEFAULTS = """---
+
+username: "admin"
+data:
+  domain: "autodesk.com"
+  ntp_servers: ["10.0.0.1", "10.0.0.2"]
+"""
+
+PLATFORMS = ["eos", "ios", "cisco_wlc"]
+REGIONS = ["amer", "emea", "apac"]
+ROLES = ["access", "distribution", "core"]
+
+
+def hosts_yaml(size):
+    lines = ["---", ""]
+    for i in range(size):
+        name = f"site{i % 200:03}cs{i:05}"
+        lines += [
+            f"{name}:",
+            f'  hostname: "{name}"',
+            "  groups:",
+            f'    - "{PLATFORMS[i % len(PLATFORMS)]}"',
+            "  data:",
+            f'    site: "site{i % 200:03}"',
+            f'    region: "{REGIONS[i % len(REGIONS)]}"',
+            f'    role: "{ROLES[i % len(ROLES)]}"',
+            f'    tags: ["rack{i % 40}", "iac"]',
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def contents(inventory):
+    # Every host's connection fields and inherited data, to compare loads.
+    return {
+        name: (host.hostname, host.platform, host.port, dict(host.items()))
+        for name, host in inventory.hosts.items()
+    }
+
+
+def timed(cls, **options):
+    start = time.perf_counter()
+    inventory = cls.deserialize(**options)
+    return time.perf_counter() - start, contents(inventory)
+
+
+def bench(size):
+    from nornir.plugins.inventory.simple import SimpleInventory
+    from inventory_snapshot import SnapshotInventory
+
+    with TemporaryDirectory() as path:
+        files = {
+            "host_file": hosts_yaml(size),
+            "group_file": GROUPS,
+            "defaults_file": DEFAULTS,
+        }
+        options = {}
+        for option, source in files.items():
+            options[option] = join(path, option.replace("_file", ".yaml"))
+            with open(options[option], "w") as f:
+                f.write(source)
+        snapshot_file = join(path, ".cache", "inventory.pickle")
+
+        before, simple = timed(SimpleInventory, **options)
+        cold, first = timed(SnapshotInventory, snapshot_file=snapshot_file, **options)
+        warm, second = timed(SnapshotInventory, snapshot_file=snapshot_file, **options)
+
+    if not simple == first == second:
+        raise SystemExit(f"Loaded inventories differ for {size} hosts.")
+    return before, cold, warm
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark inventory loading.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 5000])
+    args = parser.parse_args()
+
+    print(f"{'hosts':8} {'before':>9} {'after, cold':>13} {'after, warm':>13}")
+    for size in args.sizes:
+        before, cold, warm = bench(size)
+        print(f"{size:<8} {before:8.2f}s {cold:12.2f}s {warm:12.2f}s")
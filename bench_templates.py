@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Benchmark rendering a template tree per host: Nornir's template_file
+against the shared environments in template_cache.py.
+
+A synthetic base.j2 (including and importing other templates) is rendered
+for a synthetic inventory:
+    - before: Nornir's render_from_file, a new environment per host.
+    - after: the shared environment, compiling the templates once.
+    - after, new run: a fresh environment loading the compiled templates from
+      the on-disk bytecode cache, as the next eos_config.py run would.
+Every pass must render the same configurations.
+
+Usage:
+    :param hosts: number of hosts to render. Defaults to 2000.
+
+➜ python bench_templates.py --hosts 2000
+before            2000 hosts   15.12s
+after             2000 hosts    0.93s
+after, new run    2000 hosts    0.87s
+"""
+
+from os.path import join
+from tempfile import TemporaryDirectory
+import argparse
+import time
+
+TEMPLATES = {
+    "base.j2": """hostname {{ host.name }}
+ip domain-name {{ host.domain }}
+{% import "macros.j2" as macros %}
+{% for server in host.ntp %}
+ntp server {{ server }}
+{% endfor %}
+{% include "vlans.j2" %}
+{% include "interfaces.j2" %}
+{{ macros.banner(host.name, host.site) }}
+""",
+    "vlans.j2": """{% for vlan in host.vlans %}
+vlan {{ vlan.id }}
+   name {{ vlan.name | upper }}
+{% endfor %}
+""",
+    "interfaces.j2": """{% for interface in host.interfaces %}
+interface {{ interface.name }}
+   description {{ interface.description }}
+{% if interface.vlan %}
+   switchport access vlan {{ interface.vlan }}
+{% else %}
+   no switchport
+{% endif %}
+{% endfor %}
+""",
+    "macros.j2": """{% macro banner(name, site) -%}
+banner motd
+{{ name }} ({{ site }}) is managed by Nornir, changes will be overwritten.
+EOF
+{%- endmacro %}
+""",
+}
+
+
+def host_vars(i):
+    return {
+        "name": f"usbldcs{i:04}",
+        "site": f"site{i % 50}",
+        "domain": "autodesk.com",
+        "ntp": ["10.0.0.1", "10.0.0.2"],
+        "vlans": [{"id": v, "name": f"vlan{v}"} for v in range(10, 30)],
+        "interfaces": [
+            {
+                "name": f"Ethernet{p}",
+                "description": f"port {p}",
+                "vlan": 10 + p % 20 if p % 4 else None,
+            }
+            for p in range(1, 49)
+        ],
+    }
+
+
+def bench_before(path, inventory):
+    from nornir.core.helpers.jinja_helper import render_from_file
+
+    return [render_from_file(path, "base.j2", host=host) for host in inventory]
+
+
+def bench_after(path, inventory):
+    import template_cache
+
+    env = template_cache.get_environment(path)
+    return [env.get_template("base.j2").render(host=host) for host in inventory]
+
+
+def timed(label, bench, path, inventory):
+    start = time.monotonic()
+    configs = bench(path, inventory)
+    print(f"{label:17} {len(inventory)} hosts {time.monotonic() - start:7.2f}s")
+    return configs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark template rendering.")
+    parser.add_argument("--hosts", type=int, default=2000)
+    args = parser.parse_args()
+
+    import template_cache
+
+    inventory = [host_vars(i) for i in range(args.hosts)]
+
+    with TemporaryDirectory() as path, TemporaryDirectory() as bytecode:
+        for name, source in TEMPLATES.items():
+            with open(join(path, name), "w") as f:
+                f.write(source)
+        # Keep the benchmark's bytecode out of the real cache.
+        template_cache.BYTECODE_DIR = bytecode
+
+        before = timed("before", bench_before, path, inventory)
+        after = timed("after", bench_after, path, inventory)
+        # Drop the in-memory environment, the bytecode cache is kept.
+        template_cache.environments.clear()
+        new_run = timed("after, new run", bench_after, path, inventory)
+
+    if not before == after == new_run:
+        raise SystemExit("Rendered configurations differ.")
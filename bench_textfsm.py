@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Benchmark --parse: Netmiko style parsing on worker threads against the
+TextFSM process pool (see textfsm_pool.py).
+
+A synthetic "show interfaces status" output is parsed once per host with a
+generated template and index, so no ntc-templates checkout is needed:
+    - before: every output is parsed on one of the worker threads with a new
+      CliTable, as Netmiko's use_textfsm does.
+    - after: every output is submitted to the process pool.
+Both must return the same records.
+
+Usage:
+    :param hosts: number of outputs to parse. Defaults to 2000.
+    :param interfaces: interface lines per output. Defaults to 48.
+    :param workers: worker threads, like Nornir's num_workers. Defaults to 20.
+
+➜ python bench_textfsm.py --hosts 2000
+threads        2000 outputs   11.23s
+process pool   2000 outputs    4.01s
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from os import environ
+from os.path import join
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+import argparse
+import time
+
+TEMPLATE = """Value PORT (\\S+)
+Value NAME (.*?)
+Value STATUS (\\S+)
+Value VLAN (\\S+)
+Value DUPLEX (\\S+)
+Value SPEED (\\S+)
+Value TYPE (.*?)
+
+Start
+  ^${PORT}\\s+${NAME}\\s+${STATUS}\\s+${VLAN}\\s+${DUPLEX}\\s+${SPEED}\\s+${TYPE}\\s*$$ -> Record
+"""
+
+INDEX = """Template, Hostname, Platform, Command
+
+bench_show_interfaces_status.textfsm, .*, cisco_ios, sh[[ow]] int[[erfaces]] st[[atus]]
+"""
+
+COMMAND = "show interfaces status"
+
+
+def output(interfaces):
+    lines = ["Port      Name               Status       Vlan       Duplex  Speed Type"]
+    for i in range(1, interfaces + 1):
+        lines.append(
+            f"Gi1/0/{i:<4}usbldcs{i:02}          connected    {i % 4 + 10:<10} "
+            f"a-full a-1000 10/100/1000BaseTX"
+        )
+    return "\n".join(lines)
+
+
+def netmiko_parse(template_dir, text):
+    # What Netmiko's get_structured_data does for every command.
+    from textfsm import clitable
+
+    table = clitable.CliTable("index", template_dir)
+    table.ParseCmd(text, {"Command": COMMAND, "Platform": "cisco_ios"})
+    header = [column.lower() for column in table.header]
+    return [dict(zip(header, record)) for record in table]
+
+
+def bench_threads(template_dir, outputs, workers):
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(lambda t: netmiko_parse(template_dir, t), outputs))
+
+
+def bench_pool(outputs):
+    from textfsm_pool import parse_pool, close_pool, submit_parse, parsed_results
+
+    pool = parse_pool()
+    start = time.monotonic()
+    results = [SimpleNamespace(result=text) for text in outputs]
+    pending = [submit_parse(pool, "ios", COMMAND, result) for result in results]
+    parsed_results(pending)
+    elapsed = time.monotonic() - start
+    close_pool(pool)
+    return elapsed, [result.result for result in results]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark TextFSM parsing.")
+    parser.add_argument("--hosts", type=int, default=2000)
+    parser.add_argument("--interfaces", type=int, default=48)
+    parser.add_argument("--workers", type=int, default=20)
+    args = parser.parse_args()
+
+    outputs = [output(args.interfaces) for _ in range(args.hosts)]
+
+    with TemporaryDirectory() as template_dir:
+        with open(join(template_dir, "index"), "w") as f:
+            f.write(INDEX)
+        with open(join(template_dir, "bench_show_interfaces_status.textfsm"), "w") as f:
+            f.write(TEMPLATE)
+        # Read by the pool workers when they load the templates.
+        environ["NET_TEXTFSM"] = template_dir
+
+        start = time.monotonic()
+        before = bench_threads(template_dir, outputs, args.workers)
+        print(f"threads        {args.hosts} outputs {time.monotonic() - start:7.2f}s")
+
+        elapsed, after = bench_pool(outputs)
+        print(f"process pool   {args.hosts} outputs {elapsed:7.2f}s")
+
+    if before != after:
+        raise SystemExit("Parsed results differ.")
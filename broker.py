@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Local broker that keeps authenticated Netmiko sessions open between script runs.
+
+The broker listens on a Unix socket and holds a pool of sessions keyed by
+host and its Netmiko connection parameters. Sessions idle for longer than --idle-timeout are closed
+and the pool never holds more than --max-sessions; the least recently used
+idle session is closed to make room. Scripts use it with --broker, so
+back-to-back commands against the same devices skip connect and auth.
+
+Usage:
+    :param max_sessions: maximum number of open sessions. Defaults to 100.
+    :param idle_timeout: seconds before an idle session is closed. Defaults to 300.
+    :param socket: path of the Unix socket. Defaults to .cache/broker.sock.
+
+➜  python broker.py &
+➜  python ios_commands.py --site ussfo --broker
+"""
+
+from collections import OrderedDict
+from hashlib import sha256
+from os import makedirs, path, remove
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from threading import Lock, Thread
+import argparse
+import json
+import socket
+import time
+
+SOCKET = ".cache/broker.sock"
+
+def netmiko_connect(**kwargs):
+    from netmiko import ConnectHandler
+
+    return ConnectHandler(**kwargs)
+
+
+class SessionPool:
+    def __init__(self, max_sessions=100, idle_timeout=300, connect=netmiko_connect):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.connect = connect
+        self.lock = Lock()
+        # (host, connection parameters digest) ->
+        # {"conn", "lock", "users", "last_used"}, oldest first.
+        self.sessions = OrderedDict()
+
+    def close(self, key):
+        session = self.sessions.pop(key)
+        try:
+            session["conn"].disconnect()
+        except Exception:
+            pass
+
+    def make_room(self):
+        # Close the least recently used idle session once the pool is full.
+        if len(self.sessions) < self.max_sessions:
+            return
+        for key, session in self.sessions.items():
+            if not session["users"]:
+                self.close(key)
+                return
+        raise RuntimeError(f"Broker is at capacity ({self.max_sessions} sessions).")
+
+    def session(self, request):
+        # Sessions are only reused with the same connection parameters
+        # (credentials, port, extras). The session is marked in use before the
+        # pool lock is released, so make_room and evict_idle can't close it
+        # while it's connecting or waiting its turn.
+        connection = json.dumps(request["connection"], sort_keys=True, default=str)
+        key = (request["host"], sha256(connection.encode()).hexdigest())
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                self.make_room()
+                session = {
+                    "conn": None,
+                    "lock": Lock(),
+                    "users": 0,
+                    "last_used": time.time(),
+                }
+                self.sessions[key] = session
+            session["users"] += 1
+            self.sessions.move_to_end(key)
+        return session
+
+    def send(self, request):
+        session = self.session(request)
+        try:
+            return self.send_command(session, request)
+        finally:
+            with self.lock:
+                session["users"] -= 1
+
+    def send_command(self, session, request):
+        with session["lock"]:
+            try:
+                if session["conn"] is None:
+                    session["conn"] = self.connect(**request["connection"])
+                conn = session["conn"]
+                if request.get("use_timing"):
+                    result = conn.send_command_timing(request["command"])
+                else:
+                    result = conn.send_command(
+                        request["command"], use_textfsm=request.get("use_textfsm")
+                    )
+            except Exception:
+                # Drop the connection so the next request for the session,
+                # possibly already waiting on its lock, reconnects.
+                conn, session["conn"] = session["conn"], None
+                if conn is not None:
+                    try:
+                        conn.disconnect()
+                    except Exception:
+                        pass
+                raise
+            session["last_used"] = time.time()
+        return result
+
+    def evict_idle(self):
+        now = time.time()
+        with self.lock:
+            for key, session in list(self.sessions.items()):
+                idle = now - session["last_used"] > self.idle_timeout
+                if idle and not session["users"]:
+                    self.close(key)
+
+
+class BrokerHandler(StreamRequestHandler):
+    def handle(self):
+        # One JSON request per line, answered with one JSON response per line.
+        for line in self.rfile:
+            try:
+                response = {"result": self.server.pool.send(json.loads(line))}
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+def serve(pool, socket_path=SOCKET):
+    makedirs(path.dirname(socket_path) or ".", exist_ok=True)
+    if path.exists(socket_path):
+        remove(socket_path)
+    server = ThreadingUnixStreamServer(socket_path, BrokerHandler)
+    server.daemon_threads = True
+    server.pool = pool
+
+    def evict():
+        while True:
+            time.sleep(min(10, pool.idle_timeout))
+            pool.evict_idle()
+
+    Thread(target=evict, daemon=True).start()
+    return server
+
+
+def broker_request(request, socket_path=SOCKET):
+    # Send a single request to the broker and return its result.
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        response = json.loads(sock.makefile().readline())
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response["result"]
+
+
+def connection_parameters(task):
+    # ConnectHandler arguments for the host, built the same way as Nornir's
+    # netmiko connection plugin (connection_options, extras and ssh config).
+    from nornir.plugins.connections.netmiko import napalm_to_netmiko_map
+
+    options = task.host.get_connection_parameters("netmiko")
+    parameters = {
+        "host": options.hostname,
+        "username": options.username,
+        "password": options.password,
+        "port": options.port,
+    }
+    try:
+        parameters["ssh_config_file"] = task.nornir.config.ssh.config_file
+    except AttributeError:
+        pass
+    if options.platform is not None:
+        parameters["device_type"] = napalm_to_netmiko_map.get(
+            options.platform, options.platform
+        )
+    parameters.update(options.extras or {})
+    return parameters
+
+
+def broker_command(task, command_string, use_textfsm=False, use_timing=False):
+    # Nornir task equivalent of netmiko_send_command that goes through the broker.
+    from nornir.core.task import Result
+
+    result = broker_request(
+        {
+            "host": task.host.name,
+            "connection": connection_parameters(task),
+            "command": command_string,
+            "use_textfsm": use_textfsm,
+            "use_timing": use_timing,
+        }
+    )
+    return Result(host=task.host, result=result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Netmiko session broker.")
+    parser.add_argument("--max-sessions", type=int, default=100)
+    parser.add_argument("--idle-timeout", type=int, default=300)
+    parser.add_argument("--socket", default=SOCKET)
+    args = parser.parse_args()
+
+    pool = SessionPool(max_sessions=args.max_sessions, idle_timeout=args.idle_timeout)
+    server = serve(pool, args.socket)
+    print(f"Broker listening on {args.socket}.")
+    try:
+        server.serve_forever()
+    finally:
+        with pool.lock:
+            for key in list(pool.sessions):
+                pool.close(key)
@@ -0,0 +1,143 @@
+"""
+Description:
+Build manifest used to only render hosts whose inputs changed.
+
+For every host the manifest records a hash of each input file (region,
+site and host YAML, the template and every template it includes), of the
+data it inherits from groups.yaml and defaults.yaml, of the secrets injected
+into the template, and a hash of the rendered output. The manifest is stored per platform in
+.build/<platform>-manifest.json.
+"""
+
+from hashlib import sha256
+from os import makedirs, stat
+from os.path import join, normpath
+from threading import Lock
+from jinja2 import meta
+from template_cache import get_environment
+from config_vars import inherited_vars
+from nornir_utilities import creds
+import json
+
+MANIFEST_DIR = ".build"
+
+lock = Lock()
+
+# path -> (mtime, hash)
+hashes = {}
+# (path, template) -> list of template files
+templates = {}
+# parent group names -> hash of the inherited data
+inherited = {}
+
+# Secrets host_creds injects into the template variables.
+SECRETS = ("TACACS_KEY", "SNMP_KEY")
+
+
+def file_hash(path):
+    # Hash a file, only reading it again if it changed.
+    mtime = stat(path).st_mtime_ns
+    cached = hashes.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as f:
+        digest = sha256(f.read()).hexdigest()
+    hashes[path] = (mtime, digest)
+    return digest
+
+
+def template_files(path, template):
+    # Return the template and every template it includes, extends or imports.
+    if (path, template) in templates:
+        return templates[(path, template)]
+    env = get_environment(path)
+    found = []
+    pending = [template]
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        found.append(name)
+        source, _, _ = env.loader.get_source(env, name)
+        for ref in meta.find_referenced_templates(env.parse(source)):
+            # Dynamic references (None) can't be resolved statically.
+            if ref:
+                pending.append(ref)
+    files = [normpath(join(path, name)) for name in found]
+    templates[(path, template)] = files
+    return files
+
+
+def host_inputs(host, path, template):
+    # Return the hash of every input file used to render a host.
+    files = [
+        f"inventory/group_vars/{host['region']}.yaml",
+        f"inventory/group_vars/{host['site']}.yaml",
+        f"inventory/host_vars/{host.name}.yaml",
+    ]
+    files += template_files(path, template)
+    inputs = {normpath(f): file_hash(f) for f in files}
+    # Not files, but rendered too, so a key rotation or a groups.yaml change
+    # makes the host changed.
+    inputs["<inventory>"] = inherited_hash(host)
+    inputs["<secrets>"] = sha256(
+        "\n".join(str(creds.get(key)) for key in SECRETS).encode()
+    ).hexdigest()
+    return inputs
+
+
+def inherited_hash(host):
+    # Hash the data the host inherits, once per combination of groups.
+    groups = tuple(host.groups)
+    with lock:
+        digest = inherited.get(groups)
+    if digest is None:
+        data = json.dumps(inherited_vars(host), sort_keys=True, default=str)
+        digest = sha256(data.encode()).hexdigest()
+        with lock:
+            inherited[groups] = digest
+    return digest
+
+
+def input_hash(inputs):
+    # Combine the input hashes into a single digest.
+    digest = sha256()
+    for path, file_digest in sorted(inputs.items()):
+        digest.update(f"{path}:{file_digest}\n".encode())
+    return digest.hexdigest()
+
+
+def load_manifest(platform):
+    try:
+        with open(join(MANIFEST_DIR, f"{platform}-manifest.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(platform, manifest):
+    makedirs(MANIFEST_DIR, exist_ok=True)
+    with open(join(MANIFEST_DIR, f"{platform}-manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def unchanged(manifest, host, digest):
+    entry = manifest.get(host)
+    return entry is not None and entry["input_hash"] == digest
+
+
+def record(manifest, host, inputs, digest, output):
+    with lock:
+        manifest[host] = {
+            "inputs": inputs,
+            "input_hash": digest,
+            "output_hash": sha256(output.encode()).hexdigest(),
+        }
+
+
+def affected(manifest, paths):
+    # Return the hosts that use any of the given files as an input.
+    paths = {normpath(p) for p in paths}
+    return {
+        host for host, entry in manifest.items() if paths.intersection(entry["inputs"])
+    }
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Check that nornir_cli.py stays fast for --help.
+
+Runs "python -X importtime nornir_cli.py <subcommand> [platform] --help" for
+every subcommand and fails if any of them imports one of the heavy packages
+(Nornir, NAPALM, tqdm or dotenv) or takes longer than the time budget.
+-X importtime needs Python 3.7+. Older interpreters ignore it, so a run
+that doesn't report any imports fails instead of passing unchecked.
+
+Usage:
+    :param budget: seconds allowed per --help run. Defaults to 1.
+
+➜ python check_import_time.py
+commands ios                   0.08s  OK
+...
+"""
+
+from os.path import abspath, dirname, join
+from nornir_cli import SCRIPTS
+import argparse
+import subprocess
+import sys
+import time
+
+CLI = join(dirname(abspath(__file__)), "nornir_cli.py")
+
+# Packages that must only be loaded once the script itself runs.
+FORBIDDEN = {"nornir", "napalm", "tqdm", "dotenv"}
+
+
+def imported(stderr):
+    # Top-level packages listed by -X importtime, e.g. "napalm" for "napalm.base".
+    packages = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            name = line.rsplit("|", 1)[1].strip()
+            packages.add(name.split(".")[0])
+    return packages
+
+
+def check(subcommand, platform, budget):
+    # Return the issues found for a single subcommand.
+    command = [sys.executable, "-X", "importtime", CLI, subcommand]
+    if platform:
+        command.append(platform)
+    start = time.monotonic()
+    process = subprocess.run(
+        command + ["--help"], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    elapsed = time.monotonic() - start
+    stderr = process.stderr.decode()
+
+    issues = []
+    if process.returncode != 0:
+        issues.append(f"exited with {process.returncode}")
+    packages = imported(stderr)
+    if not packages:
+        issues.append("no imports reported, -X importtime needs Python 3.7+")
+    for package in sorted(packages & FORBIDDEN):
+        issues.append(f"imports {package}")
+    if elapsed > budget:
+        issues.append(f"took {elapsed:.2f}s, budget is {budget}s")
+    return elapsed, issues
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check nornir_cli.py --help.")
+    parser.add_argument("--budget", type=float, default=1.0)
+    args = parser.parse_args()
+
+    failed = False
+    for subcommand, platforms in SCRIPTS.items():
+        for platform in platforms:
+            elapsed, issues = check(subcommand, platform, args.budget)
+            name = f"{subcommand} {platform or ''}"
+            print(f"{name:30} {elapsed:.2f}s  {'; '.join(issues) or 'OK'}")
+            failed = failed or bool(issues)
+
+    sys.exit(1 if failed else 0)
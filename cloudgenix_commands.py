@@ -12,6 +12,11 @@ Usage:
     :param host: filter for a host
     :param site: filter for a site
     :param region: filter for a region
+    :param broker: send commands through the session broker (see broker.py).
+    :param stream: print each host as soon as it completes ("text" or "ndjson").
+    :param group: print each distinct output once with its hosts ("exact" or "masked").
+    :param wtf: write results to output/<host>-result.txt, indexed in output/index.json.
+    :param compress: compress results written with --wtf ("gzip" or "zstd").
 
 
 ➜  docker run --rm -it -v $(pwd):/nornir nornir cloudgenix_commands.py --host usstecgs02
@@ -40,37 +45,28 @@ HA State		: active
 """
 
 from nornir import InitNornir
-from nornir.plugins.tasks.networking import netmiko_send_command
 from nornir.plugins.functions.text import print_result
 from tqdm import tqdm
-from nornir_utilities import get_creds, get_args
+from nornir_utilities import get_creds, get_args, run_task, ExecCommands
+from inventory_index import select
 
 
+args = get_args()
 nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
 
 
 def exec(task, t, cmds):
 
-    get_creds(nr)
-    for cmd in cmds:
-        # Task to send exec commands.
-        task.run(
-            name=f"{cmd}", task=netmiko_send_command, command_string=cmd
-        )
+    exec_commands.send(task, cmds)
+
     t.update()
 
 
-args = get_args()
+exec_commands = ExecCommands(args, parse=False)
 
 
-if args.host:
-    hosts = nr.filter(hostname=args.host, platform="cloudgenix_ion")
-elif args.site:
-    hosts = nr.filter(site=args.site, platform="cloudgenix_ion")
-elif args.region:
-    hosts = nr.filter(region=args.region, platform="cloudgenix_ion")
-else:
-    hosts = nr.filter(platform="cloudgenix_ion")
+hosts = select(nr, args, platforms=["cloudgenix_ion"])
 
 print("-" * 80)
 commands = input("Enter command(s): ")
@@ -79,6 +75,9 @@ print("-" * 80)
 cmds = commands.split(",")
 
 with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
-    result = hosts.run(task=exec, t=t, cmds=cmds)
+    result = run_task(hosts, exec, args, t=t, cmds=cmds)
+
+exec_commands.close()
 
-print_result(result)
+if not args.stream and not args.group:
+    print_result(result)
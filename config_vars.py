@@ -0,0 +1,96 @@
+"""
+Description:
+Shared variable resolver used when rendering configurations.
+
+Variables are layered in order of least preference:
+    region_vars < site_vars < host_vars
+
+Each YAML file is parsed once per run (keyed on path and mtime), each
+region + site layer is merged once per site and every host gets a
+ChainMap overlay on top of the shared site layer instead of a new copy.
+"""
+
+from collections import ChainMap
+from os import stat
+from threading import Lock
+from ruamel.yaml import YAML
+
+lock = Lock()
+
+# path -> (mtime, data)
+files = {}
+# path -> lock held while the file is parsed
+parsing = {}
+# (region, site) -> ((region mtime, site mtime), merged data)
+sites = {}
+
+stats = {"parsed": 0, "parses_avoided": 0, "merged": 0, "merges_avoided": 0}
+
+
+def load_vars(path):
+    # Return the parsed YAML file, only parsing it again if it changed.
+    mtime = stat(path).st_mtime_ns
+    with lock:
+        path_lock = parsing.setdefault(path, Lock())
+    # Threads asking for the same file wait for the first one to parse it,
+    # so shared region and site files are parsed once on a cold start.
+    with path_lock:
+        with lock:
+            cached = files.get(path)
+            if cached and cached[0] == mtime:
+                stats["parses_avoided"] += 1
+                return cached
+        # YAML instances hold parser state and aren't thread safe, so each
+        # parse gets its own, as Nornir's load_yaml does.
+        with open(path) as f:
+            data = YAML(typ="safe").load(f) or {}
+        with lock:
+            stats["parsed"] += 1
+            files[path] = (mtime, data)
+    return mtime, data
+
+
+def site_vars(region, site):
+    # Return the merged region and site variables, merged once per site.
+    region_mtime, region_data = load_vars(f"inventory/group_vars/{region}.yaml")
+    site_mtime, site_data = load_vars(f"inventory/group_vars/{site}.yaml")
+    key = (region_mtime, site_mtime)
+    with lock:
+        cached = sites.get((region, site))
+        if cached and cached[0] == key:
+            stats["merges_avoided"] += 1
+            return cached[1]
+    merged = {**region_data, **site_data}
+    with lock:
+        stats["merged"] += 1
+        sites[(region, site)] = (key, merged)
+    return merged
+
+
+def host_vars(host):
+    # Build the variables for a host as an overlay of the shared layers.
+    # Writes (e.g. credentials) land in the first, per-host, mapping so the
+    # cached layers are never modified.
+    _, data = load_vars(f"inventory/host_vars/{host.name}.yaml")
+    return ChainMap({}, data, site_vars(host["region"], host["site"]))
+
+
+def inherited_vars(host):
+    # Data the host inherits from groups.yaml and defaults.yaml, resolved the
+    # way Nornir does (first group with the key wins, then the defaults).
+    inherited = {}
+    for group in host.groups.refs:
+        for key, value in group.items():
+            inherited.setdefault(key, value)
+    for key, value in host.defaults.data.items():
+        inherited.setdefault(key, value)
+    return inherited
+
+
+def print_stats():
+    print(
+        f"Variables: {stats['parsed']} files parsed "
+        f"({stats['parses_avoided']} parses avoided), "
+        f"{stats['merged']} site layers merged "
+        f"({stats['merges_avoided']} merges avoided)."
+    )
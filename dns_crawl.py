@@ -13,12 +13,28 @@ to the A record of the physical interface. Below is an example.
 usbldcrs01-lo0.autodesk.com                        A          10.143.201.129
 usbldcrs01.autodesk.com                            CNAME      usbldcrs01-lo0.autodesk.com
 
-To-do:
-Be able to check if an A record already exists and omit it if it does.
+Without --host or --site, every IOS and EOS device is crawled in fleet mode.
+Records are written out per site as soon as every device in the site has
+completed, sharded into <domain>.zone for A records and one file per reverse
+/24 for PTRs (e.g. 201.143.10.in-addr.arpa.zone). Each run writes to its own
+directory, output/dns/<region> or output/dns/all, so a region run doesn't
+replace the shards of another region.
+
+Every crawl also updates the fleet IP index (see ip_index.py), which answers
+who owns an address or subnet and flags duplicates and overlapping subnets.
+
+When existing zone files are passed with --zone, only the records that need
+to change are printed as an nsupdate changeset: missing records are added,
+and changed or stale records for the crawled devices are deleted.
 
 Usage:
     :param host: filter for a host
     :param site: filter for a site
+    :param region: filter for a region. Runs in fleet mode like no filter at all.
+    :param max_age: use cached interface addresses up to this many seconds old.
+    :param refresh: ignore cached interface addresses and fetch them from the devices.
+    :param zone: existing forward and reverse zone files to diff against, as
+        path or path=origin for files without $ORIGIN. Requires --host or --site.
 
 ➜ nornir dns_crawl.py --site usbld
 usbldcrs01-vlan91.autodesk.com                     A          10.143.201.2
@@ -52,58 +68,52 @@ usbldcrs01-lo1.autodesk.com                        A          10.143.201.133
 """
 
 from nornir import InitNornir
-from nornir.plugins.tasks.networking import napalm_get
-from nornir.core.filter import F
 from nornir_utilities import get_args, get_creds
+from inventory_index import select
+from scheduler import run_scheduled
+from facts_cache import FactsCache, cached_napalm_get
+from interfaces import dns_label
+from zone_index import ZoneIndex, zone_changes, zone_file
+from ip_index import IpIndex
 from ipaddress import ip_address
+from collections import Counter
+from threading import Lock
+from os import makedirs, remove
+from os.path import join
+from glob import glob
 
+args = get_args()
+if args.zone and not (args.host or args.site):
+    raise SystemExit("--zone requires --host or --site.")
 nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
 
 
 def get_l3_facts(task):
 
-    get_creds(nr)
-
-    task.run(name="Get Layer 3 facts", task=napalm_get, getters=["get_interfaces_ip"])
+    facts = task.run(
+        name="Get Layer 3 facts",
+        task=cached_napalm_get,
+        getters=["get_interfaces_ip"],
+        cache=cache,
+    )
+    ip_index.update_host(task.host.name, facts.result["get_interfaces_ip"])
 
 
 def iface_rename(iface):
 
-    if iface.startswith("Vlan"):
-        iface = iface.replace("Vlan", "-vlan")
-        return iface
-    elif iface.startswith("TenGigabitEthernet"):
-        iface = iface.replace("TenGigabitEthernet", "-te")
-        iface = iface.replace("/", "-")
-        return iface
-    elif iface.startswith("GigabitEthernet"):
-        iface = iface.replace("GigabitEthernet", "-ge")
-        iface = iface.replace("/", "-")
-        return iface
-    elif iface.startswith("Ethernet"):
-        iface = iface.replace("Ethernet", "-eth")
-        iface = iface.replace("/", "-")
-        return iface
-    elif iface.startswith("Port-channel"):
-        iface = iface.replace("Port-channel", "-po")
-        iface = iface.replace("/", "-")
-        return iface
-    elif iface.startswith("Port-Channel"):
-        iface = iface.replace("Port-Channel", "-po")
-        iface = iface.replace("/", "-")
-        return iface
-    elif iface.startswith("FastEthernet"):
-        iface = iface.replace("FastEthernet", "-fe")
-        return iface
-    elif iface.startswith("Management"):
-        iface = iface.replace("Management", "-mgmt")
-        return iface
-    elif iface.startswith("Loopback"):
-        iface = iface.replace("Loopback", "-lo")
-        return iface
-    elif iface.startswith("Tunnel"):
-        iface = iface.replace("Tunnel", "-tu")
-        return iface
+    # e.g. "Vlan91" -> "-vlan91", "GigabitEthernet0/17" -> "-ge0-17"
+    return "-" + dns_label(iface)
+
+
+def host_l3_records(host, iface_ip_result):
+
+    for iface, address in iface_ip_result.items():
+        iface = iface_rename(iface)
+        if address["ipv4"]:
+            ipv4_addr = address["ipv4"]
+            for ip in ipv4_addr.items():
+                yield {"hostname": host, "interface": iface, "ipv4": ip[0]}
 
 
 def l3_facts_results(result):
@@ -115,14 +125,7 @@ def l3_facts_results(result):
         for host, l3_facts in result.items():
             iface_ip = l3_facts[1].result
             iface_ip_result = iface_ip["get_interfaces_ip"]
-            for iface, address in iface_ip_result.items():
-                iface = iface_rename(iface)
-                if address["ipv4"]:
-                    ipv4_addr = address["ipv4"]
-                    for ip in ipv4_addr.items():
-                        results.append(
-                            {"hostname": host, "interface": iface, "ipv4": ip[0]}
-                        )
+            results.extend(host_l3_records(host, iface_ip_result))
         return results
 
 
@@ -141,21 +144,110 @@ def bind_output(l3_data, domain):
             print(f"{ptr:50} {'PTR':<10} {a_rec:<20}")
 
 
+class SiteShards:
+    # Collects records per site and writes them out as soon as every device in
+    # the site has completed. Forward records go to <domain>.zone and PTRs to
+    # one file per reverse /24, e.g. 201.143.10.in-addr.arpa.zone.
+
+    def __init__(self, hosts, domain, directory):
+        self.domain = domain
+        self.directory = directory
+        self.lock = Lock()
+        self.remaining = Counter(host.get("site") for host in hosts.values())
+        self.records = {}
+        # Only this run's scope writes to the directory, so its old shards
+        # can be replaced.
+        makedirs(directory, exist_ok=True)
+        for zone_file in glob(join(directory, "*.zone")):
+            remove(zone_file)
+
+    def add(self, site, records):
+        with self.lock:
+            self.records.setdefault(site, []).extend(records)
+
+    def done(self, site):
+        with self.lock:
+            self.remaining[site] -= 1
+            if self.remaining[site]:
+                return
+            records = self.records.pop(site, [])
+            self.write(site, records)
+
+    def write(self, site, records):
+        shards = {}
+        for item in records:
+            a_rec = item["hostname"] + item["interface"] + self.domain
+            ptr = ip_address(item["ipv4"]).reverse_pointer
+            forward = self.domain.lstrip(".")
+            shards.setdefault(forward, []).append(
+                f"{a_rec:50} {'A':<10} {item['ipv4']:<20}"
+            )
+            shards.setdefault(ptr.split(".", 1)[1], []).append(
+                f"{ptr:50} {'PTR':<10} {a_rec:<20}"
+            )
+        for zone, lines in shards.items():
+            with open(join(self.directory, f"{zone}.zone"), "a") as f:
+                f.write("\n".join(lines) + "\n")
+        print(f"{site}: {len(records)} records written.")
+
+
+def get_site_l3_facts(task, shards):
+
+    # Hand the host's records to its site, then release them from memory.
+    try:
+        get_l3_facts(task)
+        iface_ip_result = task.results[0].result["get_interfaces_ip"]
+        records = host_l3_records(task.host.name, iface_ip_result)
+        shards.add(task.host.get("site"), records)
+        del task.results[:]
+    finally:
+        shards.done(task.host.get("site"))
+
+
+def load_zones(zone_args):
+
+    # Index the existing records. Each argument is "path" or "path=origin".
+    zones = ZoneIndex()
+    for zone_arg in zone_args:
+        zones.load(*zone_file(zone_arg))
+    return zones
+
+
+def zone_output(l3_data, hostnames, zones, domain):
+
+    # Print only the records that need to change.
+    if l3_data is not None:
+        for change in zone_changes(l3_data, hostnames, zones, domain):
+            print(change)
+
+
 domain = ".autodesk.com"
 
-args = get_args()
+cache = FactsCache(max_age=args.max_age, refresh=args.refresh)
+ip_index = IpIndex.load()
 
-# The user will set a filter for a host or for a site. region filtering is not supported.
+# The user can set a filter for a host or for a site. Without either, every
+# site (or every site in a region) is crawled in fleet mode.
 # This inherently filters for IOS and EOS platforms.
-if args.host:
-    hosts = nr.filter(F(hostname=args.host) & (F(platform="ios") | F(platform="eos")))
-    result = hosts.run(task=get_l3_facts)
-    l3_data = l3_facts_results(result)
-    bind_output(l3_data, domain)
-elif args.site:
-    hosts = nr.filter(F(site=args.site) & (F(platform="ios") | F(platform="eos")))
-    result = hosts.run(task=get_l3_facts)
+hosts = select(nr, args, platforms=["ios", "eos"])
+
+if args.host or args.site:
+    # Zone files are indexed first, so a file that can't be read fails the run
+    # before any device is contacted.
+    zones = load_zones(args.zone) if args.zone else None
+    result = run_scheduled(hosts, get_l3_facts)
     l3_data = l3_facts_results(result)
-    bind_output(l3_data, domain)
+    if zones is not None:
+        zone_output(l3_data, result.keys(), zones, domain)
+    else:
+        bind_output(l3_data, domain)
 else:
-    print("Please filter for a specific host or site.")
+    # Fleet mode. Records are written per site as each site completes.
+    directory = join("output/dns", args.region or "all")
+    shards = SiteShards(hosts.inventory.hosts, domain, directory)
+    result = run_scheduled(hosts, get_site_l3_facts, shards=shards)
+    if result.failed:
+        print("Failed hosts: " + ", ".join(sorted(result.failed_hosts)))
+
+# Crawled hosts replace their entries in the fleet IP index.
+ip_index.save()
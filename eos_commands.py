@@ -8,8 +8,15 @@ Usage:
     :param host: filter for a host
     :param site: filter for a site
     :param region: filter for a region
+    :param broker: send commands through the session broker (see broker.py).
+    :param stream: print each host as soon as it completes ("text" or "ndjson").
+    :param group: print each distinct output once with its hosts ("exact" or "masked").
+    :param wtf: write results to output/<host>-result.txt, indexed in output/index.json.
+    :param compress: compress results written with --wtf ("gzip" or "zstd").
     :param config: send configuration commands. seperate multiple commands with commas.
     :param parse: use textfsm to get structure data from device.
+        With --eapi the JSON output from eAPI is returned instead.
+    :param eapi: send all exec commands in a single eAPI request.
 
 ➜  docker run --rm -it -v $(pwd):/nornir nornir eos_commands.py --host ussteacr01
 --------------------------------------------------------------------------------
@@ -55,33 +62,39 @@ ussteacr01#
 """
 
 from nornir import InitNornir
-from nornir.plugins.tasks.networking import netmiko_send_command, netmiko_send_config
+from nornir.plugins.tasks.networking import netmiko_send_config
 from nornir.plugins.functions.text import print_result
 from tqdm import tqdm
-from nornir_utilities import get_creds, get_args
+from nornir_utilities import get_creds, get_args, run_task, ExecCommands
+from inventory_index import select
 
 
+args = get_args()
 nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
 
 
 def exec(task, t, cmds):
 
-    get_creds(nr)
-    for cmd in cmds:
-        # Task to send exec commands.
-        task.run(
-            name=f"{cmd}",
-            task=netmiko_send_command,
-            command_string=cmd,
-            use_textfsm=args.parse,
+    if args.eapi:
+        # Task to send every exec command in a single eAPI request.
+        result = task.run(
+            name="Send exec commands through eAPI.",
+            task=eapi_command,
+            commands=cmds,
+            encoding="json" if args.parse else "text",
         )
+        exec_commands.write(task.host.name, result.result.items())
+        t.update()
+        return
+
+    exec_commands.send(task, cmds)
 
     t.update()
 
 
 def config(task, t, cmds):
 
-    get_creds(nr)
     # Task to load configuration to device and replaces the configuration.
     task.run(
         name="Send configuration commands.",
@@ -92,17 +105,17 @@ def config(task, t, cmds):
     t.update()
 
 
-args = get_args()
+# Optional backends are only imported when their flag is set.
+if args.eapi:
+    from eapi import eapi_command
 
+# Only exec commands sent over SSH are parsed.
+exec_commands = ExecCommands(
+    args, parse=args.parse and not args.config and not args.eapi
+)
 
-if args.host:
-    hosts = nr.filter(hostname=args.host, platform="eos")
-elif args.site:
-    hosts = nr.filter(site=args.site, platform="eos")
-elif args.region:
-    hosts = nr.filter(region=args.region, platform="eos")
-else:
-    hosts = nr.filter(platform="eos")
+
+hosts = select(nr, args, platforms=["eos"])
 
 if args.config:
     print("-" * 80)
@@ -112,7 +125,7 @@ if args.config:
     cmds = commands.split(",")
 
     with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
-        result = hosts.run(task=config, t=t, cmds=cmds)
+        result = run_task(hosts, config, args, t=t, cmds=cmds)
 else:
     print("-" * 80)
     commands = input("Enter command(s): ")
@@ -121,6 +134,9 @@ else:
     cmds = commands.split(",")
 
     with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
-        result = hosts.run(task=exec, t=t, cmds=cmds)
+        result = run_task(hosts, exec, args, t=t, cmds=cmds)
+
+exec_commands.close()
 
-print_result(result)
+if not args.stream and not args.group:
+    print_result(result)
@@ -9,55 +9,54 @@ Usage:
     :param site: filter for a site
     :param region: filter for a region
     :param check: performs a dry-run on the device with diff output if necessary.
+    :param full: render and push every host, even if its inputs are unchanged.
+    :param render: render configurations in parallel to artifacts/eos/ without pushing.
+    :param push: render configurations in parallel and push each one as soon as
+        it is rendered.
+    :param affected: filter for hosts that use the given file(s) as an input.
+        e.g. --affected inventory/group_vars/emea.yaml
 """
 
 from nornir import InitNornir
 from nornir.plugins.tasks.networking import napalm_configure
-from nornir.plugins.tasks.text import template_file
 from nornir.plugins.functions.text import print_result, print_title
-from nornir.plugins.tasks.data import load_yaml
-from nornir_utilities import get_creds, get_args
+from nornir_utilities import get_creds, get_args, host_creds
+from inventory_index import select
+from scheduler import run_scheduled
+from template_cache import render_template
+from config_vars import host_vars, print_stats
+from build_manifest import load_manifest, save_manifest, host_inputs, input_hash
+from build_manifest import unchanged, record, affected
 import logging
 from tqdm import tqdm
-from nornir.core.filter import F
 
+args = get_args()
 nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
 
 
 def eos_conf(task, t):
 
-    # Load region variables.
-    region_vars = task.run(
-        task=load_yaml,
-        file=f"inventory/group_vars/{task.host['region']}.yaml",
-        severity_level=logging.DEBUG,
-    )
-
-    # Load site variables.
-    site_vars = task.run(
-        task=load_yaml,
-        file=f"inventory/group_vars/{task.host['site']}.yaml",
-        severity_level=logging.DEBUG,
-    )
-
-    # Load host variables.
-    host_vars = task.run(
-        task=load_yaml,
-        file=f"inventory/host_vars/{task.host.name}.yaml",
-        severity_level=logging.DEBUG,
-    )
+    # Skip the host if none of its inputs changed since the last deployment.
+    inputs = host_inputs(task.host, "templates/eos/", "base.j2")
+    digest = input_hash(inputs)
+    if not args.full and unchanged(manifest, task.host.name, digest):
+        t.update()
+        return "Inputs unchanged since the last deployment."
 
-    # Merge the dicts that were loaded. This is in order of least preference.
+    # Resolve region, site and host variables from the shared cache.
+    # This is in order of least preference.
     # region_vars < site_vars < host_vars
-    task.host.data = {**region_vars.result, **site_vars.result, **host_vars.result}
+    task.host.data = host_vars(task.host)
 
-    # Retrive sensitive information (credentials, and TACACS key).
-    get_creds(nr)
+    # Re-attach sensitive information (credentials, and TACACS key)
+    # as the host data was replaced above.
+    host_creds(task.host)
 
     # Task to generate device configuration.
     conf = task.run(
         name="Generate configuration template.",
-        task=template_file,
+        task=render_template,
         path="templates/eos/",
         template="base.j2",
         severity_level=logging.DEBUG,
@@ -75,29 +74,96 @@ def eos_conf(task, t):
         dry_run=args.check,
     )
 
+    # Record what was deployed so the host is skipped until its inputs change.
+    if not args.check:
+        record(manifest, task.host.name, inputs, digest, task.host["config"])
+
     t.update()
 
 
-args = get_args()
+def push_artifact(task, t, futures):
+
+    # Wait for this host's configuration to be rendered by the process pool.
+    config = read_artifact(futures, task.host.name)
+
+    # Task to load configuration to device and replaces the configuration.
+    task.run(
+        name="Applying EOS configuration.",
+        task=napalm_configure,
+        configuration=config,
+        replace=True,
+        dry_run=args.check,
+    )
+
+    # Record what was deployed so the host is skipped until its inputs change.
+    if not args.check:
+        inputs = host_inputs(task.host, "templates/eos/", "base.j2")
+        record(manifest, task.host.name, inputs, input_hash(inputs), config)
+
+    t.update()
+
+
+def changed(host):
+    inputs = host_inputs(host, "templates/eos/", "base.j2")
+    return not unchanged(manifest, host.name, input_hash(inputs))
+
+
+manifest = load_manifest("eos")
 
 # Filter for EOS, "iac" tag, and args if any.
 
-if args.host:
-    hosts = nr.filter(F(platform="eos", tags__contains="iac", hostname=args.host))
-elif args.site:
-    hosts = nr.filter(F(platform="eos", tags__contains="iac", site=args.site))
-elif args.region:
-    hosts = nr.filter(F(platform="eos", tags__contains="iac", region=args.region))
-else:
-    hosts = nr.filter(F(platform="eos", tags__contains="iac"))
+hosts = select(nr, args, platforms=["eos"], tags=["iac"])
 
-if args.check:
-    print_title("RUNNING IAC DEPLOYMENT IN CHECK MODE.")
-else:
-    print_title("RUNNING IAC DEPLOYMENT.")
+# Only touch hosts that use the edited file(s).
+if args.affected:
+    affected_hosts = affected(manifest, args.affected)
+    hosts = hosts.filter(filter_func=lambda h: h.name in affected_hosts)
+
+if args.render:
+    print_title("RENDERING IAC CONFIGURATIONS.")
 
-with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
-    result = hosts.run(task=eos_conf, t=t)
+    # Render only. Every selected host is written to the artifacts directory.
+    from render_pipeline import render_pool, render_all, save_artifacts
 
+    with render_pool() as executor:
+        futures = render_all(executor, hosts, "eos", "templates/eos/", "base.j2")
+        with tqdm(total=len(futures), desc="Progress") as t:
+            for future in futures.values():
+                future.add_done_callback(lambda f: t.update())
+            artifacts = save_artifacts("eos", futures)
 
-print_result(result)
+    print(f"Rendered {len(artifacts)} of {len(futures)} configurations.")
+    print_stats()
+else:
+    if args.check:
+        print_title("RUNNING IAC DEPLOYMENT IN CHECK MODE.")
+    else:
+        print_title("RUNNING IAC DEPLOYMENT.")
+
+    if args.push:
+        if not args.full:
+            hosts = hosts.filter(filter_func=changed)
+
+        # Render in a process pool while pushing each config as it's ready.
+        from render_pipeline import (
+            render_pool,
+            render_all,
+            save_artifacts,
+            read_artifact,
+        )
+
+        with render_pool() as executor:
+            futures = render_all(executor, hosts, "eos", "templates/eos/", "base.j2")
+            with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
+                result = run_scheduled(
+                    hosts, push_artifact, t=t, futures=futures
+                )
+            save_artifacts("eos", futures)
+    else:
+        with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
+            result = run_scheduled(hosts, eos_conf, t=t)
+
+    save_manifest("eos", manifest)
+
+    print_result(result)
+    print_stats()
@@ -0,0 +1,96 @@
+"""
+Description:
+Persistent cache for NAPALM getter results, shared by gather_facts and dns_crawl.
+
+Results are stored in a SQLite database (.cache/facts.sqlite) keyed by host
+and getter. Each getter has its own TTL; --max-age overrides it for a run
+and --refresh ignores the cache (the fresh results are still stored). Only
+getters that are missing or stale are fetched from the device.
+"""
+
+from os import makedirs
+from os.path import dirname
+from threading import Lock
+from nornir.core.task import Result
+from nornir.plugins.tasks.networking import napalm_get
+import json
+import logging
+import sqlite3
+import time
+
+CACHE_FILE = ".cache/facts.sqlite"
+
+# Getter -> seconds a cached result stays fresh.
+TTLS = {
+    "get_facts": 24 * 3600,
+    "get_interfaces_ip": 3600,
+    "get_interfaces": 900,
+    "get_lldp_neighbors": 3600,
+    "get_ntp_servers": 24 * 3600,
+    "get_users": 24 * 3600,
+}
+DEFAULT_TTL = 900
+
+
+class FactsCache:
+    def __init__(self, path=CACHE_FILE, max_age=None, refresh=False):
+        makedirs(dirname(path), exist_ok=True)
+        self.max_age = max_age
+        self.refresh = refresh
+        self.lock = Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS facts ("
+            "host TEXT, getter TEXT, fetched REAL, data TEXT, "
+            "PRIMARY KEY (host, getter))"
+        )
+
+    def get(self, host, getter):
+        # Return the cached result, or None if it's missing or stale.
+        if self.refresh:
+            return None
+        with self.lock:
+            row = self.db.execute(
+                "SELECT fetched, data FROM facts WHERE host = ? AND getter = ?",
+                (host, getter),
+            ).fetchone()
+        if row is None:
+            return None
+        max_age = self.max_age
+        if max_age is None:
+            max_age = TTLS.get(getter, DEFAULT_TTL)
+        if time.time() - row[0] > max_age:
+            return None
+        return json.loads(row[1])
+
+    def set(self, host, getter, data):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?)",
+                (host, getter, time.time(), json.dumps(data)),
+            )
+            self.db.commit()
+
+
+def cached_napalm_get(task, getters, cache):
+    # Same result as napalm_get, but only stale getters are fetched from the device.
+    if isinstance(getters, str):
+        getters = [getters]
+
+    results = {}
+    stale = []
+    for getter in getters:
+        data = cache.get(task.host.name, getter)
+        if data is None:
+            stale.append(getter)
+        else:
+            results[getter] = data
+
+    if stale:
+        facts = task.run(task=napalm_get, getters=stale, severity_level=logging.DEBUG)
+        for getter in stale:
+            results[getter] = facts.result[getter]
+            cache.set(task.host.name, getter, facts.result[getter])
+
+    return Result(host=task.host, result={g: results[g] for g in getters})
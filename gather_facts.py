@@ -12,6 +12,9 @@ Usage:
         Multiple getters can be used as shown in the example below.
         Here's a full list of supported getters:
         https://napalm.readthedocs.io/en/latest/support/#getters-support-matrix
+    :param max_age: use cached facts up to this many seconds old.
+        Defaults to a TTL per getter, see facts_cache.py.
+    :param refresh: ignore cached facts and fetch them from the devices.
 
 ➜  gather_facts.py --host ussclpdnwsaac05 --getter get_ntp_servers get_users
 Progress: 100%|███████████████████████████████████████████████| 1/1 [00:01<00:00,  1.46s/it]
@@ -29,48 +32,36 @@ vvvv get_facts ** changed : False vvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvv
 """
 
 from nornir import InitNornir
-from nornir.plugins.tasks.networking import napalm_get
 from nornir.plugins.functions.text import print_result
 from nornir_utilities import get_creds, get_args
-from nornir.core.filter import F
+from inventory_index import select
+from scheduler import run_scheduled
+from facts_cache import FactsCache, cached_napalm_get
 from tqdm import tqdm
 
+args = get_args()
 nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
 
 
 def get_facts(task, t, getter):
 
-    get_creds(nr)
-
     task.run(
-        name=f"Gathering the following facts: {getter}", task=napalm_get, getters=getter
+        name=f"Gathering the following facts: {getter}",
+        task=cached_napalm_get,
+        getters=getter,
+        cache=cache,
     )
 
     t.update()
 
 
-args = get_args()
+cache = FactsCache(max_age=args.max_age, refresh=args.refresh)
 
-if args.host:
-    hosts = nr.filter(
-        F(hostname=args.host)
-        & (F(platform="ios") | F(platform="eos") | F(platform="junos"))
-    )
-elif args.site:
-    hosts = nr.filter(
-        F(site=args.site)
-        & (F(platform="ios") | F(platform="eos") | F(platform="junos"))
-    )
-elif args.region:
-    hosts = nr.filter(
-        F(region=args.region)
-        & (F(platform="ios") | F(platform="eos") | F(platform="junos"))
-    )
-else:
-    hosts = nr.filter(F(platform="ios") | F(platform="eos") | F(platform="junos"))
+hosts = select(nr, args, platforms=["ios", "eos", "junos"])
 
 with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
-    result = hosts.run(task=get_facts, t=t, getter=args.getter)
+    result = run_scheduled(hosts, get_facts, t=t, getter=args.getter)
 
 
 print_result(result)
@@ -0,0 +1,98 @@
+"""
+Description:
+Interface name normalization shared by dns_crawl and the LLDP scripts.
+
+Names are matched against a compiled prefix table (longest prefix wins) so
+"Gi1/0/1", "GigE1/0/1" and "GigabitEthernet1/0/1" all resolve to the same
+interface. Each name can be returned in canonical, short or DNS-safe form
+and results are memoized, as the same names repeat across the fleet.
+
+>>> canonical("Te1/1/1")
+'TenGigabitEthernet1/1/1'
+>>> canonical("Po10", "eos")
+'Port-Channel10'
+>>> short("HundredGigE1/0/49")
+'Hu1/0/49'
+>>> dns_label("GigabitEthernet0/17")
+'ge0-17'
+"""
+
+from functools import lru_cache
+import re
+
+# Canonical name -> (short name, DNS label, other names seen in the wild).
+INTERFACES = {
+    "HundredGigE": ("Hu", "hu", ["HundredGigabitEthernet"]),
+    "FortyGigabitEthernet": ("Fo", "fo", ["FortyGigE"]),
+    "TwentyFiveGigE": ("Twe", "twe", ["TwentyFiveGigabitEthernet"]),
+    "TwoGigabitEthernet": ("Tw", "tw", []),
+    "TenGigabitEthernet": ("Te", "te", ["TenGigE", "Ten"]),
+    "GigabitEthernet": ("Gi", "ge", ["GigE", "Gig"]),
+    "FastEthernet": ("Fa", "fe", []),
+    "AppGigabitEthernet": ("Ap", "ap", []),
+    "Ethernet": ("Et", "eth", ["Eth"]),
+    "Port-channel": ("Po", "po", ["Port-Channel"]),
+    "Vlan": ("Vl", "vlan", []),
+    "Loopback": ("Lo", "lo", []),
+    "Tunnel": ("Tu", "tu", []),
+    "Management": ("Ma", "mgmt", ["Mgmt"]),
+}
+
+# Platform specific spelling of canonical names.
+PLATFORM_NAMES = {
+    "eos": {"Port-channel": "Port-Channel"},
+}
+
+# FortiOS (port1, wan1, internal) and AireOS (1, LAG) names have no prefix to
+# expand, they are only made DNS safe.
+UNPREFIXED_PLATFORMS = {"fortinet", "cisco_wlc"}
+
+# Every name and alias -> canonical name.
+PREFIXES = {}
+for name, (short_name, _, aliases) in INTERFACES.items():
+    for prefix in [name, short_name] + aliases:
+        PREFIXES[prefix.lower()] = name
+
+# Longest alternatives first so the longest prefix wins. The prefix must be
+# followed by the interface number, so e.g. "port1" is not read as "Po".
+PREFIX_RE = re.compile(
+    r"^(%s)\s*(?=\d)" % "|".join(sorted(PREFIXES, key=len, reverse=True)),
+    re.IGNORECASE,
+)
+
+DNS_UNSAFE_RE = re.compile(r"[^a-z0-9-]+")
+
+
+@lru_cache(maxsize=None)
+def split(name, platform=None):
+    # Return (canonical prefix, interface number), or (None, name) if unknown.
+    if platform not in UNPREFIXED_PLATFORMS:
+        match = PREFIX_RE.match(name)
+        if match:
+            return PREFIXES[match.group(1).lower()], name[match.end():]
+    return None, name
+
+
+@lru_cache(maxsize=None)
+def canonical(name, platform=None):
+    prefix, number = split(name, platform)
+    if prefix is None:
+        return name
+    return PLATFORM_NAMES.get(platform, {}).get(prefix, prefix) + number
+
+
+@lru_cache(maxsize=None)
+def short(name, platform=None):
+    prefix, number = split(name, platform)
+    if prefix is None:
+        return name
+    return INTERFACES[prefix][0] + number
+
+
+@lru_cache(maxsize=None)
+def dns_label(name, platform=None):
+    # e.g. "Vlan91" -> "vlan91", "TenGigabitEthernet1/1/1" -> "te1-1-1"
+    prefix, number = split(name, platform)
+    if prefix is not None:
+        name = INTERFACES[prefix][1] + number
+    return DNS_UNSAFE_RE.sub("-", name.lower()).strip("-")
@@ -0,0 +1,128 @@
+"""
+Description:
+Secondary indexes over the inventory used to select hosts.
+
+The index holds a hash map per attribute (site, region, role and platform)
+and per tag, each mapping a value to a bitset of host positions. A query
+intersects the bitsets instead of evaluating filter predicates against
+every host's inherited data. Hostnames are kept sorted so --host "ussfo*"
+is a prefix range, and other glob patterns only match against the hostnames.
+
+The index is built when the inventory is loaded and stored in the inventory
+snapshot (see inventory_snapshot.py), so it's only rebuilt when the
+inventory files change. The selected hosts are then picked straight from
+the inventory by name.
+"""
+
+from bisect import bisect_left
+from fnmatch import fnmatchcase
+import re
+
+ATTRIBUTES = ("site", "region", "role", "platform")
+
+GLOB_RE = re.compile(r"[*?\[]")
+
+
+class InventoryIndex:
+    def __init__(self, inventory):
+        self.names = list(inventory.hosts)
+        self.all = (1 << len(self.names)) - 1
+        self.attributes = {attribute: {} for attribute in ATTRIBUTES}
+        self.tags = {}
+        self.hostnames = {}
+        for position, host in enumerate(inventory.hosts.values()):
+            bit = 1 << position
+            for attribute in ATTRIBUTES:
+                if attribute == "platform":
+                    value = host.platform
+                else:
+                    value = host.get(attribute)
+                index = self.attributes[attribute]
+                index[value] = index.get(value, 0) | bit
+            for tag in host.get("tags") or ():
+                self.tags[tag] = self.tags.get(tag, 0) | bit
+            self.hostnames[host.hostname] = self.hostnames.get(host.hostname, 0) | bit
+        self.sorted_hostnames = sorted(name for name in self.hostnames if name)
+
+    def any_of(self, attribute, values):
+        bits = 0
+        for value in values:
+            bits |= self.attributes[attribute].get(value, 0)
+        return bits
+
+    def hostname(self, pattern):
+        # Exact hostname, prefix ("ussfo*") or any other glob pattern.
+        if not GLOB_RE.search(pattern):
+            return self.hostnames.get(pattern, 0)
+        bits = 0
+        prefix = GLOB_RE.split(pattern, 1)[0]
+        i = bisect_left(self.sorted_hostnames, prefix)
+        simple_prefix = pattern == prefix + "*"
+        while i < len(self.sorted_hostnames):
+            name = self.sorted_hostnames[i]
+            if not name.startswith(prefix):
+                break
+            if simple_prefix or fnmatchcase(name, pattern):
+                bits |= self.hostnames[name]
+            i += 1
+        return bits
+
+    def query(self, host=None, platforms=None, tags=None, **attributes):
+        # Return the names of the hosts matching every given filter.
+        bits = self.all
+        if host:
+            bits &= self.hostname(host)
+        if platforms is not None:
+            bits &= self.any_of("platform", platforms)
+        for attribute, value in attributes.items():
+            if value:
+                bits &= self.any_of(attribute, [value])
+        for tag in tags or ():
+            bits &= self.tags.get(tag, 0)
+        # Lowest bit first, so the position in the string is the host position.
+        positions = bin(bits)[:1:-1]
+        return [self.names[i] for i, bit in enumerate(positions) if bit == "1"]
+
+
+# id(inventory) -> (inventory, index)
+indexes = {}
+
+
+def register(inventory, index):
+    # Called by the inventory plugin once the inventory is loaded.
+    indexes[id(inventory)] = (inventory, index)
+
+
+def get_index(nr):
+    # Fall back to building the index for inventories the plugin didn't load.
+    cached = indexes.get(id(nr.inventory))
+    if cached is None or cached[0] is not nr.inventory:
+        register(nr.inventory, InventoryIndex(nr.inventory))
+    return indexes[id(nr.inventory)][1]
+
+
+def select(nr, args, platforms=None, tags=None):
+    # Filter nr with the query arguments (--host, --site, --region, --platform,
+    # --role, --tag), limited to the script's platforms and required tags.
+    index = get_index(nr)
+    if args.platform:
+        platforms = [p for p in args.platform if not platforms or p in platforms]
+    names = index.query(
+        host=args.host,
+        platforms=platforms,
+        tags=list(tags or ()) + list(args.tag or ()),
+        site=args.site,
+        region=args.region,
+        role=args.role,
+    )
+    # Same as nr.filter(), without another pass over every host.
+    from nornir.core import Nornir
+    from nornir.core.inventory import Hosts, Inventory
+
+    hosts = nr.inventory.hosts
+    inventory = Inventory(
+        hosts=Hosts((name, hosts[name]) for name in names),
+        groups=nr.inventory.groups,
+        defaults=nr.inventory.defaults,
+    )
+    return Nornir(inventory=inventory, config=nr.config, data=nr.data)
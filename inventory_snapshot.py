@@ -0,0 +1,141 @@
+"""
+Description:
+SimpleInventory with a compiled snapshot of the parsed YAML files.
+
+Parsing hosts.yaml, groups.yaml and defaults.yaml dominates startup with a
+large inventory. The parsed data is pickled to .cache/inventory.pickle along
+with each source file's mtime, size and sha256. The snapshot is used as long
+as the mtime and size match, or the content hash does (e.g. after a git
+checkout touched the file), otherwise the YAML is parsed and the snapshot
+rewritten. The host index used by select() (see inventory_index.py) is
+built from the loaded inventory and kept in the same snapshot. Enabled with
+the inventory plugin in config.yaml.
+"""
+
+from hashlib import sha256
+from os import makedirs, replace, stat
+from os.path import dirname, exists, expanduser
+from nornir.plugins.inventory.simple import SimpleInventory
+from ruamel.yaml import YAML
+from inventory_index import InventoryIndex, register
+import pickle
+
+SNAPSHOT_FILE = ".cache/inventory.pickle"
+SNAPSHOT_VERSION = 2
+
+# Snapshot file -> snapshot, handed from __init__ to deserialize.
+loaded = {}
+
+
+def file_stamp(path):
+    # Return (mtime, size) of the file, or None if it doesn't exist.
+    try:
+        st = stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def file_digest(path):
+    if not exists(path):
+        return None
+    with open(path, "rb") as f:
+        return sha256(f.read()).hexdigest()
+
+
+def load_snapshot(path, sources):
+    # Return the snapshot if every source file is unchanged, else None.
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if set(snapshot["sources"]) != set(sources):
+        return None
+
+    touched = False
+    for source in sources:
+        stamp, digest = snapshot["sources"][source]
+        if tuple(stamp or ()) == tuple(file_stamp(source) or ()):
+            continue
+        if digest != file_digest(source):
+            return None
+        # Same content with a new mtime, keep the snapshot but restamp it.
+        snapshot["sources"][source] = (file_stamp(source), digest)
+        touched = True
+    if touched:
+        save_snapshot(path, snapshot)
+    return snapshot
+
+
+def save_snapshot(path, snapshot):
+    makedirs(dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    replace(path + ".tmp", path)
+
+
+def parse_yaml(path, required=False):
+    if not required and not exists(path):
+        return {}
+    with open(path) as f:
+        return YAML(typ="safe").load(f) or {}
+
+
+class SnapshotInventory(SimpleInventory):
+    def __init__(
+        self,
+        host_file="hosts.yaml",
+        group_file="groups.yaml",
+        defaults_file="defaults.yaml",
+        snapshot_file=SNAPSHOT_FILE,
+        *args,
+        **kwargs
+    ):
+        files = {
+            "hosts": expanduser(host_file),
+            "groups": expanduser(group_file) if group_file else None,
+            "defaults": expanduser(defaults_file) if defaults_file else None,
+        }
+        sources = [path for path in files.values() if path]
+
+        snapshot = load_snapshot(snapshot_file, sources)
+        if snapshot is None:
+            snapshot = {
+                "version": SNAPSHOT_VERSION,
+                "sources": {
+                    path: (file_stamp(path), file_digest(path)) for path in sources
+                },
+            }
+            for key, path in files.items():
+                snapshot[key] = parse_yaml(path, key == "hosts") if path else {}
+            # Saved by deserialize, once the index is built.
+            snapshot["index"] = None
+        loaded[snapshot_file] = snapshot
+
+        super().__init__(
+            host_file,
+            group_file,
+            defaults_file,
+            hosts=snapshot["hosts"],
+            groups=snapshot["groups"],
+            defaults=snapshot["defaults"],
+            *args,
+            **kwargs
+        )
+
+    @classmethod
+    def deserialize(cls, *args, **kwargs):
+        inventory = super().deserialize(*args, **kwargs)
+        snapshot_file = kwargs.get("snapshot_file", SNAPSHOT_FILE)
+        snapshot = loaded.pop(snapshot_file)
+        # The index is built from the inherited data, so it needs the loaded
+        # inventory. It's kept with the snapshot and shares its stamps.
+        index = snapshot["index"]
+        if index is None or index.names != list(inventory.hosts):
+            index = snapshot["index"] = InventoryIndex(inventory)
+            save_snapshot(snapshot_file, snapshot)
+        register(inventory, index)
+        return inventory
@@ -8,6 +8,11 @@ Usage:
     :param host: filter for a host
     :param site: filter for a site
     :param region: filter for a region
+    :param broker: send commands through the session broker (see broker.py).
+    :param stream: print each host as soon as it completes ("text" or "ndjson").
+    :param group: print each distinct output once with its hosts ("exact" or "masked").
+    :param wtf: write results to output/<host>-result.txt, indexed in output/index.json.
+    :param compress: compress results written with --wtf ("gzip" or "zstd").
     :param config: send configuration commands. seperate multiple commands with commas.
     :param parse: use textfsm to get structure data from device.
 
@@ -42,33 +47,27 @@ ussfo2cs201#
 """
 
 from nornir import InitNornir
-from nornir.plugins.tasks.networking import netmiko_send_command, netmiko_send_config
+from nornir.plugins.tasks.networking import netmiko_send_config
 from nornir.plugins.functions.text import print_result
 from tqdm import tqdm
-from nornir_utilities import get_creds, get_args
+from nornir_utilities import get_creds, get_args, run_task, ExecCommands
+from inventory_index import select
 
 
+args = get_args()
 nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
 
 
 def exec(task, t, cmds):
 
-    get_creds(nr)
-    for cmd in cmds:
-        # Task to send exec commands.
-        task.run(
-            name=f"{cmd}",
-            task=netmiko_send_command,
-            command_string=cmd,
-            use_textfsm=args.parse,
-        )
+    exec_commands.send(task, cmds)
 
     t.update()
 
 
 def config(task, t, cmds):
 
-    get_creds(nr)
     # Task to load configuration to device and replaces the configuration.
     task.run(
         name="Send configuration commands.",
@@ -79,17 +78,11 @@ def config(task, t, cmds):
     t.update()
 
 
-args = get_args()
+# Only exec commands are parsed.
+exec_commands = ExecCommands(args, parse=args.parse and not args.config)
 
 
-if args.host:
-    hosts = nr.filter(hostname=args.host, platform="ios")
-elif args.site:
-    hosts = nr.filter(site=args.site, platform="ios")
-elif args.region:
-    hosts = nr.filter(region=args.region, platform="ios")
-else:
-    hosts = nr.filter(platform="ios")
+hosts = select(nr, args, platforms=["ios"])
 
 if args.config:
     print("-" * 80)
@@ -99,7 +92,7 @@ if args.config:
     cmds = commands.split(",")
 
     with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
-        result = hosts.run(task=config, t=t, cmds=cmds)
+        result = run_task(hosts, config, args, t=t, cmds=cmds)
 else:
     print("-" * 80)
     commands = input("Enter exec command: ")
@@ -108,6 +101,9 @@ else:
     cmds = commands.split(",")
 
     with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
-        result = hosts.run(task=exec, t=t, cmds=cmds)
+        result = run_task(hosts, exec, args, t=t, cmds=cmds)
+
+exec_commands.close()
 
-print_result(result)
+if not args.stream and not args.group:
+    print_result(result)
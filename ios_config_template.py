@@ -1,67 +1,73 @@
 #!/usr/bin/env python3
 
 from nornir import InitNornir
-from nornir.plugins.tasks.text import template_file
 from nornir.plugins.functions.text import print_result
-from nornir.plugins.tasks.data import load_yaml
-from nornir_utilities import get_creds, get_args
-import logging
-from nornir.core.filter import F
+from nornir_utilities import get_creds, get_args, host_creds
+from inventory_index import select
+from template_cache import render_template
+from config_vars import host_vars, print_stats
+from build_manifest import load_manifest, save_manifest, host_inputs, input_hash
+from build_manifest import unchanged, record, affected
 
+args = get_args()
 nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
 
 
 def ios_conf(task):
 
-    # Load region variables.
-    region_vars = task.run(
-        task=load_yaml,
-        file=f"inventory/group_vars/{task.host['region']}.yaml",
-        severity_level=logging.DEBUG,
-    )
-
-    # Load site variables.
-    site_vars = task.run(
-        task=load_yaml,
-        file=f"inventory/group_vars/{task.host['site']}.yaml",
-        severity_level=logging.DEBUG,
-    )
-
-    # Load host variables.
-    host_vars = task.run(
-        task=load_yaml,
-        file=f"inventory/host_vars/{task.host.name}.yaml",
-        severity_level=logging.DEBUG,
-    )
+    # Skip the host if none of its inputs changed since the last build.
+    inputs = host_inputs(task.host, "templates/ios/", "base.j2")
+    digest = input_hash(inputs)
+    if not args.full and unchanged(manifest, task.host.name, digest):
+        return "Inputs unchanged since the last build."
 
-    # Merge the dicts that were loaded. This is in order of least preference.
+    # Resolve region, site and host variables from the shared cache.
+    # This is in order of least preference.
     # region_vars < site_vars < host_vars
-    task.host.data = {**region_vars.result, **site_vars.result, **host_vars.result}
+    task.host.data = host_vars(task.host)
 
-    # Retrive sensitive information (credentials, and TACACS key).
-    get_creds(nr)
+    # Re-attach sensitive information (credentials, and TACACS key)
+    # as the host data was replaced above.
+    host_creds(task.host)
 
     # Task to generate device configuration.
-    task.run(
+    conf = task.run(
         name="Generate configuration template.",
-        task=template_file,
+        task=render_template,
         path="templates/ios/",
         template="base.j2",
     )
 
+    # Record the build so the host is skipped until its inputs change.
+    record(manifest, task.host.name, inputs, digest, conf.result)
 
-args = get_args()
 
-if args.host:
-    hosts = nr.filter(F(platform="ios", hostname=args.host))
-    result = hosts.run(task=ios_conf)
-elif args.site:
-    hosts = nr.filter(F(platform="ios", site=args.site))
-    result = hosts.run(task=ios_conf)
-elif args.region:
-    hosts = nr.filter(F(platform="ios", region=args.region))
-    result = hosts.run(task=ios_conf)
+manifest = load_manifest("ios")
+
+if args.host or args.site or args.region or args.affected:
+    hosts = select(nr, args, platforms=["ios"])
 else:
-    print("Please filter for host, site or region.")
+    hosts = None
+    print("Please filter for host, site, region or affected file(s).")
+
+if hosts is not None:
+    # Only render hosts that use the edited file(s).
+    if args.affected:
+        affected_hosts = affected(manifest, args.affected)
+        hosts = hosts.filter(filter_func=lambda h: h.name in affected_hosts)
+
+    if args.render:
+        # Render in a process pool and write the configs to artifacts/ios/.
+        from render_pipeline import render_pool, render_all, save_artifacts
+
+        with render_pool() as executor:
+            futures = render_all(executor, hosts, "ios", "templates/ios/", "base.j2")
+            artifacts = save_artifacts("ios", futures)
+        print(f"Rendered {len(artifacts)} of {len(futures)} configurations.")
+    else:
+        result = hosts.run(task=ios_conf)
+        save_manifest("ios", manifest)
+        print_result(result)
 
-print_result(result)
+    print_stats()
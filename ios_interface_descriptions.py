@@ -4,74 +4,76 @@ from nornir import InitNornir
 from nornir.plugins.tasks.networking import napalm_get, netmiko_send_config
 from nornir.plugins.functions.text import print_result
 from nornir_utilities import get_creds, get_args
+from inventory_index import select
+from scheduler import run_scheduled
+from topology import Topology
+from roles import classify
 import logging
 
-nr = InitNornir(core={"num_workers": 10}, config_file="config.yaml")
+args = get_args()
+nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
 
 
 def intf_desc(task):
-    get_creds(nr)
-    # Get lldp neighbors.
-    lldp_neighbors = task.run(
-        task=napalm_get, getters=["get_lldp_neighbors"], severity_level=logging.DEBUG
-    )
+    # With --cached, LLDP neighbors come from the topology graph and only the
+    # current descriptions are fetched. Otherwise both are fetched in one pass
+    # and the host's adjacencies are refreshed in the graph.
+    neighbors = topology.ports(task.host.name) if args.cached else None
+    getters = ["get_interfaces"]
+    if neighbors is None:
+        getters.append("get_lldp_neighbors")
+    facts = task.run(task=napalm_get, getters=getters, severity_level=logging.DEBUG)
+    interfaces = facts.result["get_interfaces"]
+    if neighbors is None:
+        topology.update_host(
+            task.host.name,
+            facts.result["get_lldp_neighbors"],
+            site=task.host.get("site"),
+            platform="ios",
+        )
+        neighbors = topology.ports(task.host.name)
 
-    # Tags to be used depending on descriptions.
-    network_tag = "TRN: "
-    # server_tag: "SVR: "
-    # storage_tag: "STO: "
+    # Loop over interfaces with an LLPD neighbor and build every description
+    # for the device so they're applied in a single config session.
+    commands = []
+    matched = 0
+    for local_port, (remote_hostname, remote_port) in neighbors.items():
+        # Only neighbors with a known role (see roles.yaml) get a description.
+        tag = classify(remote_hostname, "ios")
+        if tag:
+            matched += 1
+            description = tag + remote_hostname + " on " + remote_port
 
-    # Lists with characters for network and servers
-    network_chars = [
-        "fg",
-        "cs0",
-        "crs0",
-        "cs1",
-        "cs2",
-        "cs3",
-        "cs4",
-        "cs5",
-        "cws0",
-        "cw0",
-        "cw1",
-        "cw2",
-        "cw3",
-        "cw4",
-    ]
-    # server_chars = ['vcex', 'esx']
+            # Skip interfaces that already have the description.
+            if interfaces.get(local_port, {}).get("description") == description:
+                continue
 
-    # Loop over interfaces with an LLPD neighbor.
-    for local_port, remote_host in lldp_neighbors.result["get_lldp_neighbors"].items():
-        remote_hostname = remote_host[0]["hostname"].split(".")[0].lower()
-        remote_port = remote_host[0]["port"]
+            commands += ["interface " + local_port, " description " + description]
 
-        # Check if lldp neighbor name includes network characters.
-        if any(x in remote_hostname for x in network_chars):
-            commands = [
-                "interface " + local_port,
-                " description " + network_tag + remote_hostname + " on " + remote_port,
-            ]
+    if commands:
+        task.run(
+            name="Configure interface descriptions.",
+            task=netmiko_send_config,
+            config_commands=commands,
+        )
 
-            task.run(
-                name="Configure interface descriptions.",
-                task=netmiko_send_config,
-                config_commands=commands,
-            )
+    # Previously every matching interface was configured in its own session.
+    return {
+        "interfaces_changed": len(commands) // 2,
+        "sessions_before": matched,
+        "sessions_after": 1 if commands else 0,
+    }
 
 
-args = get_args()
+topology = Topology.load()
 
-if args.host:
-    hosts = nr.filter(platform="ios", hostname=args.host)
-    result = hosts.run(task=intf_desc)
-elif args.site:
-    hosts = nr.filter(platform="ios", site=args.site)
-    result = hosts.run(task=intf_desc)
-elif args.region:
-    hosts = nr.filter(platform="ios", region=args.region)
-    result = hosts.run(task=intf_desc)
-else:
-    hosts = nr.filter(platform="ios")
-    result = hosts.run(task=intf_desc)
+hosts = select(nr, args, platforms=["ios"])
+result = run_scheduled(hosts, intf_desc)
 
 print_result(result)
+topology.save()
+
+before = sum(r[0].result["sessions_before"] for r in result.values() if not r.failed)
+after = sum(r[0].result["sessions_after"] for r in result.values() if not r.failed)
+print(f"Config sessions: {after} (previously {before}).")
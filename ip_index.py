@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Persistent fleet IP address index built from get_interfaces_ip.
+
+dns_crawl updates the index for every host it crawls, replacing only that
+host's entries, and the index is saved to .cache/ip_index.json. Addresses
+are kept in a hash map and a sorted list, and subnets in one hash map per
+prefix length, so lookups don't scan the fleet:
+    - who owns an address, and which subnet(s) it belongs to.
+    - which interfaces have an address in a subnet.
+    - duplicate addresses across devices.
+    - overlapping subnets across devices.
+
+Usage:
+    :param query: an address (owner and subnet lookup) or a subnet (members).
+    :param duplicates: list addresses configured on more than one device.
+    :param overlaps: list subnets on one device that overlap another device's.
+
+➜ python ip_index.py 10.143.201.2
+10.143.201.2         usbldcrs01           Vlan91               10.143.201.0/29
+"""
+
+from bisect import bisect_left, bisect_right
+from ipaddress import ip_address, ip_network
+from os import makedirs
+from os.path import dirname
+from threading import Lock
+import argparse
+import json
+
+INDEX_FILE = ".cache/ip_index.json"
+
+
+class IpIndex:
+    def __init__(self):
+        self.lock = Lock()
+        # host -> [[interface, address, prefix_length], ...]
+        self.hosts = {}
+        # address -> {(host, interface)}
+        self.addresses = {}
+        # prefix_length -> network address -> {(host, interface)}
+        self.networks = {}
+        self.sorted_addresses = None
+
+    def add(self, host, interface, address, prefix_length):
+        entry = (host, interface)
+        addr = int(ip_address(address))
+        network = addr & mask(prefix_length)
+        self.addresses.setdefault(addr, set()).add(entry)
+        self.networks.setdefault(prefix_length, {}).setdefault(network, set()).add(
+            entry
+        )
+
+    def discard(self, host, interface, address, prefix_length):
+        entry = (host, interface)
+        addr = int(ip_address(address))
+        network = addr & mask(prefix_length)
+        self.addresses[addr].discard(entry)
+        if not self.addresses[addr]:
+            del self.addresses[addr]
+        self.networks[prefix_length][network].discard(entry)
+        if not self.networks[prefix_length][network]:
+            del self.networks[prefix_length][network]
+
+    def update_host(self, host, interfaces_ip):
+        # Replace a host's entries with the result of get_interfaces_ip.
+        entries = [
+            [interface, address, data["prefix_length"]]
+            for interface, families in interfaces_ip.items()
+            for address, data in families.get("ipv4", {}).items()
+        ]
+        with self.lock:
+            for entry in self.hosts.pop(host, []):
+                self.discard(host, *entry)
+            for entry in entries:
+                self.add(host, *entry)
+            self.hosts[host] = entries
+            self.sorted_addresses = None
+
+    def owners(self, address):
+        return sorted(self.addresses.get(int(ip_address(address)), ()))
+
+    def subnets(self, address):
+        # Return (subnet, owners) for each subnet containing the address,
+        # longest prefix first.
+        addr = int(ip_address(address))
+        found = []
+        for prefix_length in sorted(self.networks, reverse=True):
+            network = addr & mask(prefix_length)
+            owners = self.networks[prefix_length].get(network)
+            if owners:
+                found.append((to_network(network, prefix_length), sorted(owners)))
+        return found
+
+    def members(self, subnet):
+        # Return (address, host, interface) for every address in the subnet.
+        subnet = ip_network(subnet, strict=False)
+        with self.lock:
+            if self.sorted_addresses is None:
+                self.sorted_addresses = sorted(self.addresses)
+            addresses = self.sorted_addresses
+        first = bisect_left(addresses, int(subnet.network_address))
+        last = bisect_right(addresses, int(subnet.broadcast_address))
+        return [
+            (str(ip_address(addr)), host, interface)
+            for addr in addresses[first:last]
+            for host, interface in sorted(self.addresses.get(addr, ()))
+        ]
+
+    def duplicates(self):
+        # Addresses configured on more than one device.
+        return {
+            str(ip_address(addr)): sorted(owners)
+            for addr, owners in sorted(self.addresses.items())
+            if len({host for host, _ in owners}) > 1
+        }
+
+    def overlaps(self):
+        # Subnets that sit inside a shorter subnet configured on another device.
+        found = []
+        lengths = sorted(self.networks)
+        for prefix_length in lengths:
+            for network, owners in self.networks[prefix_length].items():
+                hosts = {host for host, _ in owners}
+                for shorter in lengths:
+                    if shorter >= prefix_length:
+                        break
+                    outer = self.networks[shorter].get(network & mask(shorter))
+                    if outer and {host for host, _ in outer} - hosts:
+                        found.append(
+                            (
+                                to_network(network, prefix_length),
+                                sorted(owners),
+                                to_network(network & mask(shorter), shorter),
+                                sorted(outer),
+                            )
+                        )
+        return found
+
+    def save(self, path=INDEX_FILE):
+        makedirs(dirname(path), exist_ok=True)
+        with self.lock:
+            with open(path, "w") as f:
+                json.dump(self.hosts, f, sort_keys=True)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        index = cls()
+        try:
+            with open(path) as f:
+                hosts = json.load(f)
+        except FileNotFoundError:
+            return index
+        for host, entries in hosts.items():
+            for entry in entries:
+                index.add(host, *entry)
+            index.hosts[host] = entries
+        return index
+
+
+def mask(prefix_length):
+    return (0xFFFFFFFF << (32 - prefix_length)) & 0xFFFFFFFF
+
+
+def to_network(network, prefix_length):
+    return f"{ip_address(network)}/{prefix_length}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the fleet IP index.")
+    parser.add_argument("query", nargs="?", help="Address or subnet to look up.")
+    parser.add_argument("--duplicates", default=False, action="store_true")
+    parser.add_argument("--overlaps", default=False, action="store_true")
+    args = parser.parse_args()
+
+    index = IpIndex.load()
+
+    if args.query and "/" in args.query:
+        for address, host, interface in index.members(args.query):
+            print(f"{address:20} {host:20} {interface:20}")
+    elif args.query:
+        subnets = index.subnets(args.query)
+        subnet = subnets[0][0] if subnets else ""
+        for host, interface in index.owners(args.query):
+            print(f"{args.query:20} {host:20} {interface:20} {subnet}")
+        for subnet, owners in subnets:
+            for host, interface in owners:
+                print(f"{'':20} {host:20} {interface:20} {subnet}")
+    if args.duplicates:
+        for address, owners in index.duplicates().items():
+            for host, interface in owners:
+                print(f"{address:20} {host:20} {interface:20} DUPLICATE")
+    if args.overlaps:
+        for network, owners, outer, outer_owners in index.overlaps():
+            print(
+                f"{network:20} {', '.join(h for h, _ in owners):40} overlaps "
+                f"{outer} on {', '.join(h for h, _ in outer_owners)}"
+            )
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Script to send exec commands to every platform in a single run.
+
+Each platform gets its own commands, either from a YAML command map or
+entered at the prompt, and every host runs in the same worker pool with the
+per-platform limits from scheduler.py. Platform specific Netmiko options
+(e.g. use_timing for Fortinet) are applied per host. Results are printed
+grouped by platform, then host.
+
+Usage:
+    :param host: filter for a host
+    :param site: filter for a site
+    :param region: filter for a region
+    :param command_map: YAML file of platform -> list of commands. Without it,
+        commands are entered for each platform (leave empty to skip it).
+    :param parse: use textfsm to get structure data from device.
+    :param broker: send commands through the session broker (see broker.py).
+    :param stream: print each host as soon as it completes ("text" or "ndjson").
+    :param group: print each distinct output once with its hosts ("exact" or "masked").
+    :param wtf: write results to output/<host>-result.txt, indexed in output/index.json.
+    :param compress: compress results written with --wtf ("gzip" or "zstd").
+
+➜ cat commands.yaml
+ios: ["show version | i uptime"]
+cisco_wlc: ["show sysinfo"]
+fortinet: ["get system status"]
+cloudgenix_ion: ["dump overview"]
+
+➜ python multi_commands.py --site ussfo --command-map commands.yaml
+"""
+
+from nornir import InitNornir
+from nornir.plugins.functions.text import print_result, print_title
+from tqdm import tqdm
+from ruamel.yaml import YAML
+from nornir_utilities import get_creds, get_args, run_task, ExecCommands
+from inventory_index import select
+
+# Netmiko options per platform.
+NETMIKO_OPTIONS = {
+    "fortinet": {"use_timing": True},
+}
+
+args = get_args()
+nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
+
+
+def exec(task, t, commands):
+
+    platform = task.host.platform
+    exec_commands.send(task, commands[platform], **NETMIKO_OPTIONS.get(platform, {}))
+
+    t.update()
+
+
+exec_commands = ExecCommands(args)
+
+hosts = select(nr, args)
+
+platforms = sorted(
+    {host.platform for host in hosts.inventory.hosts.values() if host.platform}
+)
+
+if args.command_map:
+    with open(args.command_map) as f:
+        commands = YAML(typ="safe").load(f) or {}
+else:
+    commands = {}
+    print("-" * 80)
+    for platform in platforms:
+        entered = input(f"Enter command(s) for {platform}: ")
+        if entered:
+            commands[platform] = entered.split(",")
+    print("-" * 80)
+
+# Only run against platforms that have commands.
+hosts = hosts.filter(filter_func=lambda host: bool(commands.get(host.platform)))
+
+with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
+    result = run_task(hosts, exec, args, t=t, commands=commands)
+
+exec_commands.close()
+
+if not args.wtf and not args.stream and not args.group:
+    for platform in sorted(commands):
+        names = sorted(
+            name
+            for name, host in hosts.inventory.hosts.items()
+            if host.platform == platform
+        )
+        if not names:
+            continue
+        print_title(platform)
+        for name in names:
+            print_result(result[name])
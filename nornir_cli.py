@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Single entry point for the scripts.
+
+The subcommand picks the script and every other argument is passed through
+to it. Arguments are checked against the shared parser before the script is
+loaded, so --help and typos return without importing Nornir, NAPALM or the
+inventory. Only the chosen script's imports are ever loaded.
+
+Usage:
+    commands <ios|eos|wlc|fortinet|cloudgenix|all>: send exec or config commands.
+        "all" sends each platform its own commands in one run.
+    config <eos|ios>: build and push configurations.
+    facts: gather facts.
+    dns: crawl A and PTR records.
+    mlag: validate EOS MLAG.
+    descriptions <ios|eos>: set interface descriptions from LLDP.
+
+➜ python nornir_cli.py commands ios --host ussfo2cs201
+➜ python nornir_cli.py config eos --check
+➜ python nornir_cli.py facts --host ussclpdnwsaac37 --getter get_interfaces
+"""
+
+from os.path import abspath, dirname, join
+import argparse
+import runpy
+import sys
+
+# Subcommand -> platform -> script. None is used when there is no platform.
+SCRIPTS = {
+    "commands": {
+        "ios": "ios_commands.py",
+        "eos": "eos_commands.py",
+        "wlc": "wlc_commands.py",
+        "fortinet": "fortinet_commands.py",
+        "cloudgenix": "cloudgenix_commands.py",
+        "all": "multi_commands.py",
+    },
+    "config": {"eos": "eos_config.py", "ios": "ios_config_template.py"},
+    "facts": {None: "gather_facts.py"},
+    "dns": {None: "dns_crawl.py"},
+    "mlag": {None: "validate_eos_mlag.py"},
+    "descriptions": {
+        "ios": "ios_interface_descriptions.py",
+        "eos": "eos_interface_descriptions.py",
+    },
+}
+
+
+def get_script():
+    # Return the script for the subcommand and the arguments to pass to it.
+    parser = argparse.ArgumentParser(
+        description="Run a Nornir script.",
+        epilog="Use '<subcommand> [platform] --help' for the script's arguments.",
+    )
+    subparsers = parser.add_subparsers(dest="subcommand")
+    subparsers.required = True
+    for subcommand, platforms in SCRIPTS.items():
+        subparser = subparsers.add_parser(subcommand, add_help=False)
+        if None not in platforms:
+            subparser.add_argument("platform", choices=sorted(platforms))
+    args, script_args = parser.parse_known_args()
+    script = SCRIPTS[args.subcommand][getattr(args, "platform", None)]
+    return join(dirname(abspath(__file__)), script), script_args
+
+
+if __name__ == "__main__":
+    script, script_args = get_script()
+    sys.argv = [script] + script_args
+
+    # Fail on bad arguments (or print --help) before the script is loaded.
+    from nornir_utilities import get_args
+
+    get_args()
+
+    runpy.run_path(script, run_name="__main__")
@@ -1,23 +1,127 @@
 from os import getenv
-from dotenv import load_dotenv
 import argparse
-from nornir.plugins.tasks.files import write_file
+
+
+# Platform to the environment variable holding its password.
+# Platforms that are not listed use PASSWORD.
+PLATFORM_CREDS = {"cloudgenix_ion": "CG_PASSWORD"}
+
+# Secrets resolved from the environment, loaded once per run.
+creds = {}
 
 
 def get_creds(nr):
-    # Load credentials.
-    load_dotenv()
-    password = getenv("PASSWORD")
-    snmp_key = getenv("SNMP_KEY")
-    tacacs_key = getenv("TACACS_KEY")
-    cg_password = getenv("CG_PASSWORD")
+    # Load credentials once and attach them to every host in the inventory.
+    if not creds:
+        # Imported here so parsing arguments doesn't pay for it.
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        keys = {"PASSWORD", "SNMP_KEY", "TACACS_KEY", *PLATFORM_CREDS.values()}
+        for key in keys:
+            creds[key] = getenv(key)
     for host in nr.inventory.hosts.values():
-        if host.platform == "cloudgenix_ion":
-            host.password = cg_password
+        host_creds(host)
+
+
+def host_creds(host):
+    # Attach the already loaded secrets to a single host.
+    # Used when a task replaces host data after startup.
+    host.password = creds[PLATFORM_CREDS.get(host.platform, "PASSWORD")]
+    host["tacacs_key"] = creds["TACACS_KEY"]
+    host["snmp_key"] = creds["SNMP_KEY"]
+
+
+def run_task(hosts, task, args, **kwargs):
+    # Run the task in the output mode selected with --stream or --group.
+    # Each mode is imported here so parsing arguments doesn't pay for it.
+    if args.stream:
+        from stream_output import run_streamed
+
+        return run_streamed(hosts, task, args.stream, **kwargs)
+    if args.group:
+        from aggregate import run_grouped
+
+        return run_grouped(hosts, task, args.group, **kwargs)
+    from scheduler import run_scheduled
+
+    return run_scheduled(hosts, task, **kwargs)
+
+
+class ExecCommands:
+    # Sends exec commands with the backend, parsing and result file selected
+    # with --broker, --parse and --wtf. Shared by the *_commands.py scripts.
+    def __init__(self, args, parse=None):
+        # parse: whether --parse applies to this run, defaults to args.parse.
+        if args.broker:
+            from broker import broker_command as send_command
         else:
-            host.password = password
-        host["tacacs_key"] = tacacs_key
-        host["snmp_key"] = snmp_key
+            from nornir.plugins.tasks.networking import netmiko_send_command
+
+            send_command = netmiko_send_command
+        self.send_command = send_command
+
+        self.sink = None
+        if args.wtf:
+            from result_sink import ResultSink
+
+            self.sink = ResultSink(compression=args.compress)
+
+        self.parser = None
+        if args.parse if parse is None else parse:
+            from textfsm_pool import parse_pool
+
+            self.parser = parse_pool()
+
+    def send(self, task, cmds, **options):
+        # Send each command to the task's host, options are passed to every
+        # send (e.g. use_timing).
+        if self.parser is not None:
+            from textfsm_pool import submit_parse, parsed_results
+
+        pending = []
+        try:
+            for cmd in cmds:
+                # Task to send exec commands.
+                result = task.run(
+                    name=f"{cmd}",
+                    task=self.send_command,
+                    command_string=cmd,
+                    **options,
+                )
+                if self.parser is not None:
+                    # Parsed in the process pool while the next command is sent.
+                    pending.append(
+                        submit_parse(self.parser, task.host.platform, cmd, result[0])
+                    )
+                elif self.sink is not None:
+                    # Written as it comes back, so a failed command doesn't lose
+                    # the host's earlier outputs.
+                    self.sink.add(task.host.name, cmd, result.result)
+        finally:
+            # Outputs sent before a failed command are still parsed and written.
+            if pending:
+                parsed_results(pending)
+                outputs = [(result.name, result.result) for result, _ in pending]
+                self.write(task.host.name, outputs)
+            elif self.sink is not None:
+                self.sink.flush_host(task.host.name)
+
+    def write(self, host, outputs):
+        # Write a host's (command, output) pairs to the result file with --wtf.
+        if self.sink is not None:
+            for cmd, output in outputs:
+                self.sink.add(host, cmd, output)
+            self.sink.flush_host(host)
+
+    def close(self):
+        # Called once every host is done.
+        if self.sink is not None:
+            self.sink.close()
+        if self.parser is not None:
+            from textfsm_pool import close_pool
+
+            close_pool(self.parser)
 
 
 def get_args():
@@ -46,9 +150,92 @@ def get_args():
         default=False,
         action="store_true",
     )
-    parser.add_argument("--host", help="Filter by host.")
+    parser.add_argument(
+        "--stream",
+        help="Print each host's results as soon as it completes.",
+        choices=["text", "ndjson"],
+    )
+    parser.add_argument(
+        "--eapi",
+        help="Send EOS commands in a single eAPI request.",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--group",
+        help="Print each distinct output once with the hosts that returned it. "
+        "'masked' ignores hostnames, uptimes, serials and counters.",
+        choices=["exact", "masked"],
+    )
+    parser.add_argument(
+        "--broker",
+        help="Send commands through the local session broker.",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--render",
+        help="Render configurations to the artifacts directory without pushing.",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--push",
+        help="Render configurations in parallel and push each one once ready.",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--full",
+        help="Render every host, including hosts whose inputs are unchanged.",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--affected",
+        help="Filter for hosts that use any of these files as an input.",
+        nargs="+",
+    )
+    parser.add_argument(
+        "--compress",
+        help="Compress results written to file.",
+        choices=["gzip", "zstd"],
+    )
+    parser.add_argument(
+        "--max-age",
+        help="Use cached facts up to this many seconds old.",
+        type=int,
+    )
+    parser.add_argument(
+        "--refresh",
+        help="Ignore cached facts and fetch them from the devices.",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--zone",
+        help="Existing forward and reverse BIND zone files to diff against, as "
+        "path or path=origin for files without $ORIGIN.",
+        nargs="+",
+    )
+    parser.add_argument(
+        "--command-map",
+        help="YAML file of platform to commands, for multi_commands.py.",
+    )
+    parser.add_argument(
+        "--cached",
+        help="Use LLDP neighbors from the cached topology graph.",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--host", help="Filter by host. Accepts a prefix or glob, e.g. 'ussfo*'."
+    )
     parser.add_argument("--site", help="Filter by site.")
     parser.add_argument("--region", help="Filter by region.")
+    parser.add_argument("--platform", help="Filter by platform.", nargs="+")
+    parser.add_argument("--role", help="Filter by role.")
+    parser.add_argument("--tag", help="Filter by tags (all must match).", nargs="+")
     parser.add_argument(
         "--getter", help="Filter by getter.", nargs="+", default="get_facts"
     )
@@ -56,15 +243,3 @@ def get_args():
 
     return args
 
-
-def write_to_file(task, result):
-
-    content = "*" * 15 + result.name + "*" * 15 + "\n\n" + result.result + "\n"
-
-    task.run(
-        name=f"Results for {task.host}.",
-        task=write_file,
-        content=content,
-        filename=f"output/{task.host}-result.txt",
-        append=True,
-    )
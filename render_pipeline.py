@@ -0,0 +1,86 @@
+"""
+Description:
+Offline render stage for configuration templates.
+
+Configurations are rendered in a process pool across all cores and written
+to artifacts/<platform>/<host>.cfg with a manifest.json describing them.
+The futures returned by render_all can be consumed by a push task, so a
+device is pushed as soon as its own artifact is ready instead of waiting
+for the whole fleet to finish rendering.
+"""
+
+from collections import ChainMap
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from hashlib import sha256
+from os import makedirs
+from os.path import join
+from template_cache import get_environment
+from config_vars import host_vars, inherited_vars
+from nornir_utilities import creds
+import json
+
+ARTIFACTS_DIR = "artifacts"
+
+
+def render_pool():
+    # Workers are forked (the default on Linux) on the first submit, from the
+    # main thread, so they don't re-run the calling script on import.
+    return ProcessPoolExecutor()
+
+
+def render_host(platform, path, template, filters, name, variables):
+    # Runs in a worker process. Returns the artifact details for the manifest.
+    env = get_environment(path, filters)
+    text = env.get_template(template).render(host=variables)
+    artifact = join(ARTIFACTS_DIR, platform, f"{name}.cfg")
+    with open(artifact, "w") as f:
+        f.write(text)
+    return {
+        "file": artifact,
+        "sha256": sha256(text.encode()).hexdigest(),
+        "rendered": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def template_vars(host):
+    # Plain, picklable view of what the template sees as "host" in eos_conf,
+    # where the region, site and host variables replace the host's own data
+    # and the group and defaults data is still inherited.
+    variables = dict(ChainMap(host_vars(host), inherited_vars(host)))
+    variables["name"] = host.name
+    variables["hostname"] = host.hostname
+    variables["platform"] = host.platform
+    variables["tacacs_key"] = creds["TACACS_KEY"]
+    variables["snmp_key"] = creds["SNMP_KEY"]
+    return variables
+
+
+def render_all(executor, hosts, platform, path, template):
+    # Submit every host to the pool and return host name -> future.
+    # Same jinja filters as render_template, from config.yaml.
+    filters = hosts.config.jinja2.filters
+    makedirs(join(ARTIFACTS_DIR, platform), exist_ok=True)
+    return {
+        name: executor.submit(
+            render_host, platform, path, template, filters, name, template_vars(host)
+        )
+        for name, host in hosts.inventory.hosts.items()
+    }
+
+
+def save_artifacts(platform, futures):
+    # Write the manifest for the artifacts that rendered successfully.
+    manifest = {}
+    for name, future in futures.items():
+        if future.exception() is None:
+            manifest[name] = future.result()
+    with open(join(ARTIFACTS_DIR, platform, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def read_artifact(futures, name):
+    # Block until the artifact for a host is rendered and return its config.
+    with open(futures[name].result()["file"]) as f:
+        return f.read()
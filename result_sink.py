@@ -0,0 +1,131 @@
+"""
+Description:
+Buffered result sink used when writing results to file (--wtf).
+
+Worker threads only append to a per-host buffer. Once a host is done its
+buffer is handed to a single background writer thread, which opens
+output/<host>-result.txt once and writes every record for that host.
+
+Records can optionally be compressed with gzip or zstd (requires the
+zstandard package). Each record is compressed on its own, so an index
+(output/index.json) of host -> command -> byte offset and length lets a
+single output be read back without scanning or decompressing the file.
+Hosts the writer fails to write (e.g. disk full) are reported by close(),
+the other hosts are still written.
+"""
+
+from os import makedirs
+from os.path import join
+from queue import Queue
+from threading import Lock, Thread
+import gzip
+import json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def compress(data, compression):
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def decompress(data, compression):
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+class ResultSink:
+    def __init__(self, directory="output", compression=None):
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package.")
+        self.directory = directory
+        self.compression = compression
+        self.lock = Lock()
+        self.buffers = {}
+        self.queue = Queue()
+        self.index = load_index(directory)
+        # (host, exception) for every host the writer thread failed to write.
+        self.errors = []
+        makedirs(directory, exist_ok=True)
+        self.writer = Thread(target=self.write, daemon=True)
+        self.writer.start()
+
+    def add(self, host, name, result):
+        if not isinstance(result, str):
+            result = json.dumps(result, indent=2, default=str)
+        content = "*" * 15 + name + "*" * 15 + "\n\n" + result + "\n"
+        with self.lock:
+            self.buffers.setdefault(host, []).append((name, content))
+
+    def flush_host(self, host):
+        # Hand the host's buffered records to the writer thread.
+        with self.lock:
+            records = self.buffers.pop(host, None)
+        if records:
+            self.queue.put((host, records))
+
+    def write(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            host, records = item
+            try:
+                self.write_host(host, records)
+            except Exception as e:
+                # Keep writing the other hosts, the error is reported by close.
+                self.errors.append((host, e))
+
+    def write_host(self, host, records):
+        filename = f"{host}-result.txt{EXTENSIONS[self.compression]}"
+        with open(join(self.directory, filename), "ab") as f:
+            for name, content in records:
+                data = compress(content.encode(), self.compression)
+                offset = f.tell()
+                f.write(data)
+                # Only indexed once written.
+                self.index.setdefault(host, {})[name] = {
+                    "file": filename,
+                    "offset": offset,
+                    "length": len(data),
+                    "compression": self.compression,
+                }
+
+    def close(self):
+        # Flush hosts that were never flushed, wait for the writer and save the index.
+        for host in list(self.buffers):
+            self.flush_host(host)
+        self.queue.put(None)
+        self.writer.join()
+        with open(join(self.directory, "index.json"), "w") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        for host, error in self.errors:
+            print(f"Failed to write the results of {host}: {error}")
+
+
+def load_index(directory="output"):
+    try:
+        with open(join(directory, "index.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def read_result(host, name, directory="output"):
+    # Read a single command's output back using the index.
+    entry = load_index(directory)[host][name]
+    with open(join(directory, entry["file"]), "rb") as f:
+        f.seek(entry["offset"])
+        data = f.read(entry["length"])
+    return decompress(data, entry["compression"]).decode()
@@ -0,0 +1,53 @@
+"""
+Description:
+Neighbor role classifier shared by the interface description scripts.
+
+Role rules are loaded from roles.yaml and compiled into a single regex with
+one branch per rule, so a hostname is classified in one match and the first
+matching rule wins. Results are memoized, as the same neighbors are seen
+from many devices.
+
+>>> classify("usbldcrs01", "ios")
+'TRN: '
+>>> classify("usbldnwsaac01", "ios") is None
+True
+"""
+
+from functools import lru_cache
+from ruamel.yaml import YAML
+import re
+
+ROLES_FILE = "roles.yaml"
+
+
+@lru_cache(maxsize=None)
+def matcher(platform=None, path=ROLES_FILE):
+    # Return the compiled regex and the tag of each rule's group.
+    with open(path) as f:
+        rules = YAML(typ="safe").load(f) or []
+
+    branches = []
+    tags = {}
+    for rule in rules:
+        if platform not in rule.get("platforms", [platform]):
+            continue
+        if not rule.get("patterns"):
+            continue
+        group = f"rule{len(branches)}"
+        patterns = "|".join(re.escape(p.lower()) for p in rule["patterns"])
+        branches.append(f"(?=.*?(?:{patterns}))(?P<{group}>)")
+        tags[group] = rule["tag"]
+
+    # A lookahead per rule keeps the rule order, not the position in the
+    # hostname, deciding which rule wins.
+    return re.compile("^(?:%s)" % "|".join(branches or ["(?!)"])), tags
+
+
+@lru_cache(maxsize=None)
+def classify(hostname, platform=None):
+    # Return the description tag for the neighbor's role, or None.
+    regex, tags = matcher(platform)
+    match = regex.match(hostname.lower())
+    if match is None:
+        return None
+    return tags[match.lastgroup]
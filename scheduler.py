@@ -0,0 +1,130 @@
+"""
+Description:
+Per-platform and per-site concurrency limits with adaptive scheduling.
+
+Caps are read from the "concurrency" section of user_defined in config.yaml.
+Each platform and each site gets its own limit, which starts at half of its
+cap and adapts to what's observed:
+    - a host that fails halves the limit.
+    - while hosts average more than twice the baseline latency of their
+      platform (a low percentile of its recent successful hosts), each host
+      lowers it by one.
+    - otherwise each host raises it by one, up to the cap.
+
+So fast device classes (e.g. EOS over eAPI) run at their cap while slow ones
+(e.g. FortiGates) or WAN constrained sites are not overloaded.
+"""
+
+from collections import deque
+from threading import Condition, Lock
+import time
+
+# Used for platforms that are not listed in config.yaml.
+DEFAULT_PLATFORM_CAP = 20
+
+# Successful latencies kept per limit, and the percentile used as baseline.
+LATENCY_WINDOW = 50
+BASELINE_PERCENTILE = 0.1
+
+lock = Lock()
+limits = {}
+
+
+class AdaptiveLimit:
+    def __init__(self, cap):
+        self.cap = cap
+        self.limit = max(1, cap // 2)
+        self.in_flight = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.slowdown = 1.0
+        self.cond = Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= self.limit:
+                self.cond.wait()
+            self.in_flight += 1
+
+    def observe(self, elapsed):
+        # Return how much slower a successful host was than the baseline. The
+        # baseline is a low percentile of a rolling window, so one unusually
+        # fast host doesn't make every later host look slow forever.
+        with self.cond:
+            self.latencies.append(elapsed)
+            ordered = sorted(self.latencies)
+            baseline = ordered[int(len(ordered) * BASELINE_PERCENTILE)]
+            return elapsed / baseline if baseline else 1.0
+
+    def release(self, slowdown, failed):
+        with self.cond:
+            self.in_flight -= 1
+            if failed:
+                self.limit = max(1, self.limit // 2)
+            else:
+                # Exponentially weighted moving average of the slowdown.
+                self.slowdown = 0.8 * self.slowdown + 0.2 * slowdown
+                if self.slowdown > 2:
+                    self.limit = max(1, self.limit - 1)
+                else:
+                    self.limit = min(self.cap, self.limit + 1)
+            self.cond.notify_all()
+
+
+def get_limit(kind, key, cap):
+    with lock:
+        if (kind, key) not in limits:
+            limits[(kind, key)] = AdaptiveLimit(cap)
+        return limits[(kind, key)]
+
+
+def platform_cap(concurrency, platform):
+    return concurrency.get("platform", {}).get(platform, DEFAULT_PLATFORM_CAP)
+
+
+def scheduled(task, sub_task, concurrency, **kwargs):
+    # Run sub_task for the host once its platform and site have a free slot.
+    # Slots are always taken platform first, then site, so threads can't deadlock.
+    host_limits = [
+        get_limit(
+            "platform",
+            task.host.platform,
+            platform_cap(concurrency, task.host.platform),
+        )
+    ]
+    site = task.host.get("site")
+    if site and concurrency.get("site"):
+        host_limits.append(get_limit("site", site, concurrency["site"]))
+
+    for limit in host_limits:
+        limit.acquire()
+    start = time.monotonic()
+    failed = True
+    try:
+        result = sub_task(task, **kwargs)
+        failed = False
+        return result
+    finally:
+        # Latency is compared per platform, so a site with slow device classes
+        # isn't throttled just for being slower than EOS. Failed hosts (e.g.
+        # auth refused in a few ms) are left out of the baseline.
+        slowdown = 1.0
+        if not failed:
+            slowdown = host_limits[0].observe(time.monotonic() - start)
+        for limit in reversed(host_limits):
+            limit.release(slowdown, failed)
+
+
+def run_scheduled(hosts, task, **kwargs):
+    # Drop-in for hosts.run(task=task, ...) using the adaptive scheduler.
+    concurrency = hosts.config.user_defined.get("concurrency", {})
+    platforms = {host.platform for host in hosts.inventory.hosts.values()}
+    num_workers = sum(platform_cap(concurrency, p) for p in platforms)
+    name = kwargs.pop("name", task.__name__)
+    return hosts.run(
+        task=scheduled,
+        name=name,
+        sub_task=task,
+        concurrency=concurrency,
+        num_workers=max(1, min(num_workers, len(hosts.inventory.hosts))),
+        **kwargs,
+    )
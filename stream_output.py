@@ -0,0 +1,87 @@
+"""
+Description:
+Stream each host's results as soon as its task completes.
+
+Instead of buffering the whole AggregatedResult for print_result, each host
+is written out (compact text or NDJSON) the moment it finishes and its
+results are then released. The order hosts completed in and the ok/failed
+counts are kept for the summary at the end of the run.
+"""
+
+from threading import Lock
+from scheduler import run_scheduled
+import json
+import sys
+
+
+class ResultStream:
+    def __init__(self, fmt="text", out=sys.stdout):
+        self.fmt = fmt
+        self.out = out
+        self.lock = Lock()
+        self.order = []
+        self.failed = []
+
+    def emit(self, host, results, failed):
+        if self.fmt == "ndjson":
+            line = json.dumps(
+                {
+                    "host": host,
+                    "failed": failed,
+                    "results": [
+                        {"name": r.name, "failed": r.failed, "result": r.result}
+                        for r in results
+                    ],
+                },
+                default=str,
+            )
+        else:
+            lines = [f"==== {host} {'FAILED' if failed else 'ok'} " + "=" * 40]
+            for r in results:
+                lines.append(f"---- {r.name}")
+                lines.append(str(r.exception if r.failed else r.result))
+            line = "\n".join(lines)
+
+        with self.lock:
+            self.order.append(host)
+            if failed:
+                self.failed.append(host)
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def summary(self):
+        ok = len(self.order) - len(self.failed)
+        print(f"Completed {len(self.order)} hosts: {ok} ok, {len(self.failed)} failed.")
+        if self.failed:
+            print("Failed: " + ", ".join(self.failed))
+
+
+def flatten(results):
+    for r in results:
+        if isinstance(r, list):
+            yield from flatten(r)
+        else:
+            yield r
+
+
+def streamed(task, stream_task, stream, **kwargs):
+    # Run stream_task, emit its results and release them from memory.
+    try:
+        stream_task(task, **kwargs)
+    except Exception:
+        # Failed hosts keep their results so Nornir reports the exception.
+        stream.emit(task.host.name, list(flatten(task.results)), True)
+        raise
+    stream.emit(task.host.name, list(flatten(task.results)), False)
+    del task.results[:]
+    return "Streamed."
+
+
+def run_streamed(hosts, task, fmt, **kwargs):
+    # Drop-in for run_scheduled that streams results. Prints the summary at the end.
+    stream = ResultStream(fmt)
+    result = run_scheduled(
+        hosts, streamed, name=task.__name__, stream_task=task, stream=stream, **kwargs
+    )
+    stream.summary()
+    return result
@@ -0,0 +1,105 @@
+"""
+Description:
+TextFSM parsing in a process pool, used by the command scripts with --parse.
+
+Netmiko's use_textfsm parses on the Nornir worker thread, holding the GIL,
+and builds a new TextFSM object from the template file for every command.
+Instead, commands are sent without it and the raw output is submitted to a
+process pool as soon as it arrives. Each worker loads the ntc-templates index
+(NET_TEXTFSM) once and keeps the compiled FSM of every template it has
+used, so the output of many hosts is parsed in parallel on every core while
+the threads keep talking to devices.
+
+Like Netmiko, the raw output is returned when there's no template for the
+command or the template returns nothing.
+"""
+
+from multiprocessing import get_context
+from os import cpu_count, getenv
+from os.path import exists, expanduser, join
+
+# Set in each worker by load_templates.
+index = None
+template_dir = None
+fsms = {}
+
+
+def templates_path():
+    # Same location Netmiko uses.
+    return getenv("NET_TEXTFSM", expanduser("~/ntc-templates/templates"))
+
+
+def parse_pool():
+    # The pool restarts a worker whose initializer fails, forever, so a
+    # missing index would hang every parse instead of failing.
+    if not exists(join(templates_path(), "index")):
+        raise FileNotFoundError(
+            f"No TextFSM index in {templates_path()}, set NET_TEXTFSM."
+        )
+    # Fork so the workers don't re-run the calling script on import. Pool
+    # starts every worker now, from the main thread, as forking later from
+    # one of Nornir's threads isn't safe.
+    return get_context("fork").Pool(cpu_count(), initializer=load_templates)
+
+
+def close_pool(pool):
+    pool.close()
+    pool.join()
+
+
+def load_templates():
+    # Runs once in each worker process.
+    global index, template_dir
+    from textfsm import clitable
+
+    template_dir = templates_path()
+    index = clitable.CliTable("index", template_dir)
+
+
+def compiled_fsm(template):
+    from textfsm import TextFSM
+
+    fsm = fsms.get(template)
+    if fsm is None:
+        with open(join(template_dir, template)) as f:
+            fsm = fsms[template] = TextFSM(f)
+    return fsm
+
+
+def parse_output(platform, command, output):
+    # Runs in a worker process. Same result as Netmiko's use_textfsm.
+    from textfsm import clitable
+    from nornir.plugins.connections.netmiko import napalm_to_netmiko_map
+
+    device_type = napalm_to_netmiko_map.get(platform, platform)
+    attributes = {"Command": command, "Platform": device_type}
+    row = index.index.GetRowMatch(attributes)
+    if not row:
+        return output
+    templates = index.index.index[row]["Template"]
+
+    if ":" in templates:
+        # Results of several templates are merged by CliTable, not cached.
+        table = clitable.CliTable("index", template_dir)
+        table.ParseCmd(output, attributes)
+        header = [column.lower() for column in table.header]
+        records = [list(record) for record in table]
+    else:
+        fsm = compiled_fsm(templates)
+        fsm.Reset()
+        header = [column.lower() for column in fsm.header]
+        records = fsm.ParseText(output)
+
+    parsed = [dict(zip(header, record)) for record in records]
+    return parsed or output
+
+
+def submit_parse(pool, platform, command, result):
+    # Start parsing a Nornir result's raw output.
+    return result, pool.apply_async(parse_output, (platform, command, result.result))
+
+
+def parsed_results(pending):
+    # Wait for the parsed outputs and swap them in for the raw output.
+    for result, parsed in pending:
+        result.result = parsed.get()
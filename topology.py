@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+"""
+Description:
+Persistent LLDP topology graph built from get_lldp_neighbors.
+
+The interface description scripts update the graph for every host they run
+against, replacing only that host's adjacencies, and the graph is saved to
+.cache/topology.json. The graph can then be queried without touching the
+devices:
+    - the neighbors of a device.
+    - the shortest path between two devices.
+    - the uplinks a site depends on (adjacencies leaving the site).
+    - adjacencies that are missing or asymmetric (A sees B on a port, but B
+      doesn't see A or sees something else on that port).
+
+Usage:
+    :param neighbors: print the neighbors of a device.
+    :param path: print the path between two devices.
+    :param uplinks: print the uplinks of a site.
+    :param asymmetric: print missing and asymmetric adjacencies.
+
+➜ python topology.py --neighbors usbldcrs01
+usbldcrs01           GigabitEthernet1/0/1      usbldcs01            Ethernet49
+"""
+
+from collections import deque
+from os import makedirs
+from os.path import dirname
+from threading import Lock
+from interfaces import canonical
+import argparse
+import json
+import time
+
+TOPOLOGY_FILE = ".cache/topology.json"
+
+
+def node_name(hostname):
+    # "usbldcs01.autodesk.com" -> "usbldcs01"
+    return hostname.split(".")[0].lower()
+
+
+class Topology:
+    def __init__(self):
+        self.lock = Lock()
+        # host -> {"site", "platform", "fetched", "ports": {local: [remote, port,
+        # port as reported]}}. Remote ports are canonical so both ends match.
+        self.hosts = {}
+        # host -> {remote: [(local port, remote port), ...]} in both directions.
+        self.adjacency = {}
+
+    def link(self, host, ports):
+        for local_port, (remote, remote_port, *_) in ports.items():
+            self.adjacency.setdefault(host, {}).setdefault(remote, []).append(
+                (local_port, remote_port)
+            )
+            self.adjacency.setdefault(remote, {}).setdefault(host, []).append(
+                (remote_port, local_port)
+            )
+
+    def unlink(self, host, ports):
+        for local_port, (remote, remote_port, *_) in ports.items():
+            self.adjacency[host][remote].remove((local_port, remote_port))
+            self.adjacency[remote][host].remove((remote_port, local_port))
+            for a, b in ((host, remote), (remote, host)):
+                if not self.adjacency[a][b]:
+                    del self.adjacency[a][b]
+
+    def update_host(self, host, lldp_neighbors, site=None, platform=None):
+        # Replace a host's adjacencies with the result of get_lldp_neighbors.
+        host = node_name(host)
+        ports = {}
+        for local_port, neighbors in lldp_neighbors.items():
+            if neighbors:
+                ports[canonical(local_port, platform)] = [
+                    node_name(neighbors[0]["hostname"]),
+                    canonical(neighbors[0]["port"]),
+                    neighbors[0]["port"],
+                ]
+        with self.lock:
+            if host in self.hosts:
+                self.unlink(host, self.hosts[host]["ports"])
+            self.hosts[host] = {
+                "site": site,
+                "platform": platform,
+                "fetched": time.time(),
+                "ports": ports,
+            }
+            self.link(host, ports)
+
+    def ports(self, host):
+        # Local port -> (remote host, remote port) as last seen by the host, with
+        # the remote port as the neighbor reported it (e.g. for descriptions).
+        entry = self.hosts.get(node_name(host))
+        if entry is None:
+            return None
+        return {
+            local: (remote[0], remote[-1]) for local, remote in entry["ports"].items()
+        }
+
+    def neighbors(self, host):
+        # Return (local port, remote host, remote port) seen from either end.
+        host = node_name(host)
+        return sorted(
+            (local_port, remote, remote_port)
+            for remote, links in self.adjacency.get(host, {}).items()
+            for local_port, remote_port in set(links)
+        )
+
+    def path(self, source, target):
+        # Shortest path (fewest hops) as a list of hosts, or None.
+        source, target = node_name(source), node_name(target)
+        previous = {source: None}
+        queue = deque([source])
+        while queue:
+            host = queue.popleft()
+            if host == target:
+                path = []
+                while host is not None:
+                    path.append(host)
+                    host = previous[host]
+                return path[::-1]
+            for remote in self.adjacency.get(host, {}):
+                if remote not in previous:
+                    previous[remote] = host
+                    queue.append(remote)
+        return None
+
+    def uplinks(self, site):
+        # Adjacencies from a host in the site to a host outside of it.
+        found = []
+        for host, entry in self.hosts.items():
+            if entry["site"] != site:
+                continue
+            for local_port, (remote, remote_port, *_) in entry["ports"].items():
+                remote_entry = self.hosts.get(remote)
+                if remote_entry is None or remote_entry["site"] != site:
+                    found.append((host, local_port, remote, remote_port))
+        return sorted(found)
+
+    def asymmetries(self):
+        # Adjacencies the far end (when crawled) doesn't report back.
+        found = []
+        for host, entry in self.hosts.items():
+            for local_port, (remote, remote_port, *_) in entry["ports"].items():
+                remote_entry = self.hosts.get(remote)
+                if remote_entry is None:
+                    continue
+                seen = remote_entry["ports"].get(remote_port)
+                if seen is None:
+                    problem = "missing"
+                elif tuple(seen[:2]) != (host, local_port):
+                    problem = f"asymmetric, sees {seen[0]} {seen[1]}"
+                else:
+                    continue
+                found.append((host, local_port, remote, remote_port, problem))
+        return sorted(found)
+
+    def save(self, path=TOPOLOGY_FILE):
+        makedirs(dirname(path), exist_ok=True)
+        with self.lock:
+            with open(path, "w") as f:
+                json.dump(self.hosts, f, sort_keys=True)
+
+    @classmethod
+    def load(cls, path=TOPOLOGY_FILE):
+        topology = cls()
+        try:
+            with open(path) as f:
+                topology.hosts = json.load(f)
+        except FileNotFoundError:
+            return topology
+        # Hosts saved without the reported remote ports are fetched again.
+        topology.hosts = {
+            host: entry
+            for host, entry in topology.hosts.items()
+            if all(len(remote) == 3 for remote in entry["ports"].values())
+        }
+        for host, entry in topology.hosts.items():
+            topology.link(host, entry["ports"])
+        return topology
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the LLDP topology graph.")
+    parser.add_argument("--neighbors", help="Device to list the neighbors of.")
+    parser.add_argument("--path", help="Devices to find a path between.", nargs=2)
+    parser.add_argument("--uplinks", help="Site to list the uplinks of.")
+    parser.add_argument("--asymmetric", default=False, action="store_true")
+    args = parser.parse_args()
+
+    topology = Topology.load()
+
+    if args.neighbors:
+        for local_port, remote, remote_port in topology.neighbors(args.neighbors):
+            print(f"{args.neighbors:20} {local_port:25} {remote:20} {remote_port}")
+    if args.path:
+        path = topology.path(*args.path)
+        print(" -> ".join(path) if path else "No path found.")
+    if args.uplinks:
+        for host, local_port, remote, remote_port in topology.uplinks(args.uplinks):
+            print(f"{host:20} {local_port:25} {remote:20} {remote_port}")
+    if args.asymmetric:
+        for host, local_port, remote, remote_port, problem in topology.asymmetries():
+            print(f"{host:20} {local_port:25} {remote:20} {remote_port:25} {problem}")
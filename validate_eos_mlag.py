@@ -1,58 +1,173 @@
-from nornir import InitNornir
-from nornir.plugins.tasks.networking import netmiko_send_command
+#!/usr/bin/env python3
+
+"""
+Description:
+Script to validate MLAG health on EOS devices.
+
+Both "show mlag" and "show mlag interfaces states active-partial" are
+collected from each switch in a single eAPI request. Switches are then
+grouped into MLAG pairs by the MLAG system ID both peers share (site and
+domain ID on releases that don't report it) and each pair is checked for
+MLAG state, negotiation, peer-link, config-sanity and active-partial
+interfaces. A single report is printed once every switch has completed.
+
+Usage:
+    :param host: filter for a host
+    :param site: filter for a site
+    :param region: filter for a region
+    :param wtf: also write the report to output/mlag-report.json
 
-# from nornir.plugins.functions.text import print_result
-# from tqdm import tqdm
+➜ nornir validate_eos_mlag.py --site ussfo
+Site       Domain          Members                            Status     Issues
+ussfo      mlag1           ussfo2cs201, ussfo2cs202           OK
+ussfo      mlag2           ussfo2cs203, ussfo2cs204           FAIL       ussfo2cs203: config-sanity is inconsistent
+                                                                         ussfo2cs204: Port-Channel12 is active-partial
+"""
+
+from nornir import InitNornir
 from nornir_utilities import get_creds, get_args
+from inventory_index import select
+from scheduler import run_scheduled
+from eapi import eapi_command
+from tqdm import tqdm
+from os import makedirs
 import json
 
+args = get_args()
 nr = InitNornir(config_file="config.yaml")
+get_creds(nr)
 
 
-def exec(task):
-
-    get_creds(nr)
+def exec(task, t):
 
-    # Task to send exec commands.
-    mlag_result = task.run(task=netmiko_send_command, command_string="show mlag | json")
-    mlag_result = json.loads(mlag_result.result)
-
-    mlag_int_result = task.run(
-        task=netmiko_send_command,
-        command_string="show mlag interfaces states active-partial | json",
+    # Task to send both commands in a single eAPI request.
+    mlag = task.run(
+        task=eapi_command,
+        commands=["show mlag", "show mlag interfaces states active-partial"],
     )
-    mlag_int_result = json.loads(mlag_int_result.result)
-
-    # if mlag_result["configSanity"] == "inconsistent":
-    #     print(f"{task.host} has inconsistent MLAG config sanity.")
+    mlag_result = mlag.result["show mlag"]
+    mlag_int_result = mlag.result["show mlag interfaces states active-partial"]
 
     act_part_int = []
-    for interface, data in mlag_int_result.items():
+    for data in mlag_int_result.values():
         if data:
             for po in data.values():
                 act_part_int.append(po["localInterface"])
 
-    if len(act_part_int) >= 1:
+    t.update()
+
+    return {
+        "site": task.host.get("site"),
+        "domain": mlag_result.get("domainId"),
+        "system_id": mlag_result.get("systemId"),
+        "state": mlag_result.get("state"),
+        "negotiation": mlag_result.get("negStatus"),
+        "peer_link": mlag_result.get("peerLink"),
+        "peer_link_status": mlag_result.get("peerLinkStatus"),
+        "local_interface_status": mlag_result.get("localIntfStatus"),
+        "config_sanity": mlag_result.get("configSanity"),
+        "active_partial": act_part_int,
+    }
+
+
+def switch_issues(switch):
+    # Return the issues found on a single member of an MLAG pair.
+    issues = []
+    if switch["state"] != "active":
+        issues.append(f"MLAG state is {switch['state']}")
+    if switch["negotiation"] != "connected":
+        issues.append(f"negotiation status is {switch['negotiation']}")
+    if switch["peer_link_status"] != "up":
+        issues.append(
+            f"peer-link {switch['peer_link']} is {switch['peer_link_status']}"
+        )
+    if switch["local_interface_status"] != "up":
+        issues.append(f"local interface is {switch['local_interface_status']}")
+    if switch["config_sanity"] != "consistent":
+        issues.append(f"config-sanity is {switch['config_sanity']}")
+    for interface in switch["active_partial"]:
+        issues.append(f"{interface} is active-partial")
+    return issues
+
+
+def mlag_report(result):
+
+    pairs = {}
+    failed = []
+    not_configured = []
+
+    # Group switches into MLAG pairs. Peers negotiate the same system ID, so
+    # pairs with a reused domain ID (or a host without a site) stay apart.
+    for host, multi_result in result.items():
+        if multi_result.failed:
+            failed.append(host)
+            continue
+        switch = multi_result[0].result
+        if switch["state"] == "disabled" or not switch["domain"]:
+            not_configured.append(host)
+            continue
+        key = switch["system_id"] or (switch["site"], switch["domain"])
+        pairs.setdefault(key, {})[host] = switch
+
+    report = {
+        "pairs": [],
+        "failed": sorted(failed),
+        "not_configured": sorted(not_configured),
+    }
+
+    for members in pairs.values():
+        switches = [switch for host, switch in sorted(members.items())]
+        issues = [
+            f"{host}: {issue}"
+            for host, switch in sorted(members.items())
+            for issue in switch_issues(switch)
+        ]
+        if len(members) != 2:
+            issues.append(f"expected 2 members, found {len(members)}")
+        if len({switch["domain"] for switch in switches}) > 1:
+            issues.append("domain ID differs between members")
+        report["pairs"].append(
+            {
+                "site": switches[0]["site"],
+                "domain": switches[0]["domain"],
+                "members": sorted(members),
+                "status": "FAIL" if issues else "OK",
+                "issues": issues,
+            }
+        )
+
+    report["pairs"].sort(key=lambda p: (p["site"] or "", p["domain"], p["members"]))
+    return report
+
+
+def print_report(report):
+
+    print(f"{'Site':10} {'Domain':15} {'Members':34} {'Status':10} Issues")
+    for pair in report["pairs"]:
+        members = ", ".join(pair["members"])
+        issues = pair["issues"] or [""]
         print(
-            f"{task.host} has the following MLAG interface(s) in an active-partial state:"
+            f"{pair['site'] or '':10} {pair['domain']:15} {members:34} "
+            f"{pair['status']:10} {issues[0]}"
         )
-        for i in act_part_int:
-            print("\t", i)
-    # t.update()
+        for issue in issues[1:]:
+            print(f"{'':72} {issue}")
 
+    if report["not_configured"]:
+        print("\nMLAG not configured: " + ", ".join(report["not_configured"]))
+    if report["failed"]:
+        print("\nFailed to collect MLAG state: " + ", ".join(report["failed"]))
 
-args = get_args()
 
-if args.host:
-    hosts = nr.filter(hostname=args.host, platform="eos")
-elif args.site:
-    hosts = nr.filter(site=args.site, platform="eos")
-elif args.region:
-    hosts = nr.filter(region=args.region, platform="eos")
-else:
-    hosts = nr.filter(platform="eos")
-
-# with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
-#     result = hosts.run(task=exec, t=t)
-result = hosts.run(task=exec)
-# print_result(result)
+hosts = select(nr, args, platforms=["eos"])
+
+with tqdm(total=len(hosts.inventory.hosts), desc="Progress") as t:
+    result = run_scheduled(hosts, exec, t=t)
+
+report = mlag_report(result)
+print_report(report)
+
+if args.wtf:
+    makedirs("output", exist_ok=True)
+    with open("output/mlag-report.json", "w") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,164 @@
+"""
+Description:
+Indexed view of existing BIND zone files used by dns_crawl to build changesets.
+
+Forward and reverse zone files are parsed line by line into hash indexes of
+A records (by name and by address) and PTR records (by name and by target).
+Crawled records are then compared against the indexes in a single pass and
+only the missing, changed and stale records are emitted, in nsupdate format:
+
+update add usbldcrs01-vlan91.autodesk.com. 3600 A 10.143.201.2
+update delete usbldcrs01-vlan91.autodesk.com. A 10.143.201.3
+
+Relative names are qualified with the file's $ORIGIN. Files without one (the
+origin set in named.conf) take it from "path=origin", or from the file name
+(e.g. db.autodesk.com or 201.143.10.in-addr.arpa.zone). A relative name that
+can't be qualified is an error, as it would never match a crawled record.
+"""
+
+from bisect import bisect_left
+from ipaddress import ip_address
+from os.path import basename
+
+DEFAULT_TTL = 3600
+
+CLASSES = {"IN", "CH", "HS"}
+
+
+def absolute(name, origin):
+    # Return a lower case, fully qualified name without the trailing dot.
+    if name == "@":
+        return origin
+    if name.endswith("."):
+        return name[:-1].lower()
+    return f"{name}.{origin}".lower() if origin else name.lower()
+
+
+def file_origin(path):
+    # "db.autodesk.com" or "autodesk.com.zone" -> "autodesk.com", else None.
+    name = basename(path).lower()
+    if name.startswith("db."):
+        name = name[3:]
+    for suffix in (".zone", ".db"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    return name.rstrip(".") if "." in name else None
+
+
+def zone_file(arg):
+    # Split a --zone argument, "path" or "path=origin", into path and origin.
+    path, _, origin = arg.partition("=")
+    return path, origin or file_origin(path)
+
+
+class ZoneIndex:
+    def __init__(self):
+        self.a_by_name = {}
+        self.a_by_ip = {}
+        self.ptr_by_name = {}
+        self.ptr_by_target = {}
+        self.records = 0
+
+    def add(self, index, key, value):
+        index.setdefault(key, set()).add(value)
+
+    def load(self, path, origin=None):
+        # Parse a zone file, keeping only the A and PTR records.
+        origin = absolute(origin, "") if origin else ""
+
+        def qualify(name):
+            if not origin and not name.endswith("."):
+                raise ValueError(
+                    f"{path}: can't qualify {name!r} without an origin, add "
+                    f"$ORIGIN or pass the file as {path}=<origin>."
+                )
+            return absolute(name, origin)
+
+        owner = None
+        depth = 0
+        with open(path) as f:
+            for line in f:
+                line = line.split(";", 1)[0]
+                # Skip continuation lines of multi-line records (e.g. SOA).
+                if depth:
+                    depth += line.count("(") - line.count(")")
+                    continue
+                depth = line.count("(") - line.count(")")
+                fields = line.split()
+                if not fields:
+                    continue
+                if fields[0] == "$ORIGIN":
+                    origin = qualify(fields[1])
+                    continue
+                if fields[0].startswith("$"):
+                    continue
+                # Lines starting with whitespace belong to the previous owner.
+                if not line[0].isspace():
+                    owner = qualify(fields.pop(0))
+                # Skip the optional TTL and class before the type.
+                while fields and (
+                    fields[0].isdigit() or fields[0].upper() in CLASSES
+                ):
+                    fields.pop(0)
+                if len(fields) < 2 or owner is None:
+                    continue
+                rtype, rdata = fields[0].upper(), fields[1]
+                if rtype == "A":
+                    self.add(self.a_by_name, owner, rdata)
+                    self.add(self.a_by_ip, rdata, owner)
+                    self.records += 1
+                elif rtype == "PTR":
+                    target = qualify(rdata)
+                    self.add(self.ptr_by_name, owner, target)
+                    self.add(self.ptr_by_target, target, owner)
+                    self.records += 1
+
+
+def zone_changes(l3_data, hostnames, zones, domain, ttl=DEFAULT_TTL):
+    # Yield nsupdate lines for records that are missing, changed or stale.
+    # Additions are emitted while streaming over the crawled records. Deletions
+    # follow once every address for a name (e.g. secondaries) has been seen.
+    seen_a = {}
+    seen_ptr = {}
+
+    for item in l3_data:
+        name = (item["hostname"] + item["interface"] + domain).lower()
+        ip = item["ipv4"]
+        ptr = ip_address(ip).reverse_pointer
+        seen_a.setdefault(name, set()).add(ip)
+        seen_ptr.setdefault(ptr, set()).add(name)
+
+        if ip not in zones.a_by_name.get(name, ()):
+            yield f"update add {name}. {ttl} A {ip}"
+        if name not in zones.ptr_by_name.get(ptr, ()):
+            yield f"update add {ptr}. {ttl} PTR {name}."
+
+    # Changed records.
+    for name, ips in seen_a.items():
+        for old in sorted(zones.a_by_name.get(name, set()) - ips):
+            yield f"update delete {name}. A {old}"
+    for ptr, names in seen_ptr.items():
+        for old in sorted(zones.ptr_by_name.get(ptr, set()) - names):
+            yield f"update delete {ptr}. PTR {old}."
+
+    # Stale records that belong to a crawled host's interfaces.
+    a_names = sorted(zones.a_by_name)
+    ptr_targets = sorted(zones.ptr_by_target)
+    for hostname in sorted(hostnames):
+        prefix = hostname.lower() + "-"
+        for name in prefixed(a_names, prefix):
+            if name.endswith(domain) and name not in seen_a:
+                for ip in sorted(zones.a_by_name[name]):
+                    yield f"update delete {name}. A {ip}"
+        for target in prefixed(ptr_targets, prefix):
+            if target.endswith(domain):
+                for ptr in sorted(zones.ptr_by_target[target] - seen_ptr.keys()):
+                    yield f"update delete {ptr}. PTR {target}."
+
+
+def prefixed(names, prefix):
+    # Yield the names in a sorted list that start with prefix.
+    i = bisect_left(names, prefix)
+    while i < len(names) and names[i].startswith(prefix):
+        yield names[i]
+        i += 1